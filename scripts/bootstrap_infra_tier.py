@@ -5,12 +5,25 @@ Bootstrap: Infrastructure-Tier fuer Workflow-Hooks.
 Fuehre dieses Script im Terminal aus (nicht via Claude):
   python3 scripts/bootstrap_infra_tier.py
 
+Mehrere Checkouts/Worktrees parallel patchen:
+  python3 scripts/bootstrap_infra_tier.py ~/src/wt-a ~/src/wt-b ... [--jobs 16]
+
+Guards ueber einen residenten Hook-Daemon laufen lassen (--no-daemon zurueck):
+  python3 scripts/bootstrap_infra_tier.py --daemon
+
+Hook-Latenz vor/nach dem Patchen messen:
+  python3 scripts/bootstrap_infra_tier.py bench [ROOT] [--runs 200]
+
 Es patcht 4 Dateien:
 
 1. strict_code_gate.py
    - Neue Kategorie INFRASTRUCTURE_DIRS (.claude/hooks/, .claude/agents/)
    - Braucht __infra__ Token, aber KEINEN vollen Workflow
    - .claude/agents/ aus ALWAYS_ALLOWED_DIRS entfernt
+   - Pfad-Checks ueber einen generierten, kompilierten Klassifikator
+     (installiert .claude/hooks/infra_paths.py)
+   - Override-Pruefung parst workflow_state.json nur einmal
+     (installiert .claude/hooks/infra_state.py)
 
 2. override_token_listener.py
    - Erstellt __infra__ Token wenn kein aktiver Workflow existiert
@@ -18,231 +31,202 @@ Es patcht 4 Dateien:
 
 3. override_token_bash_guard.py
    - Blockt Bash-Commands die workflow_state.json manipulieren
-   - Erlaubt workflow_state_multi.py (offizielles CLI)
+   - Erlaubt workflow_state_multi.py (offizielles CLI), aber nicht mit
+     $(...)/`...` oder Redirect auf workflow_state
    - Schliesst die Luecke, durch die Claude den State direkt aendern konnte
+   - Prueft je Teilkommando (&&, ||, ;, |), Heredocs inklusive
+     (installiert .claude/hooks/infra_bash.py, geteilt mit 4.)
+   - Blockt .claude/hooks/.infra_hookd/ (Socket und Kontroll-Token des
+     Hook-Daemons, siehe --daemon)
 
 4. state_integrity_guard.py
    - Git-Befehle in Whitelist (git add/commit/diff/push etc.)
    - Git-Operationen auf bereits genehmigte Datei-Aenderungen sind sicher
+   - Nur wenn JEDES Teilkommando git ist (kein "git add x && python3 -c ...")
 
 Nach dem Ausfuehren kann Claude Hooks aendern — aber NUR nach "override" vom User.
-"""
 
-import re
-from pathlib import Path
+Alle Patches einer Datei werden gebuendelt: die Datei wird genau einmal
+gelesen, alle Ersetzungen laufen in Reihenfolge im Speicher, und das Ergebnis
+wird einmal atomar (Temp-Datei + rename) geschrieben. Ein abgebrochener Lauf
+hinterlaesst damit nie eine halb gepatchte Datei. Alle Anker einer Datei
+werden in einem Durchlauf gesucht; mehrdeutige (mehrfach vorkommende) oder
+ueberlappende Anker werden als WARN gemeldet.
+
+Nach dem Patchen schreibt das Script .claude/hooks/.infra_tier.manifest.json
+(Groesse, mtime, SHA-256 je Datei + Patch-Set-Version). Folgelaeufe
+entscheiden "aktuell" per stat(); nur bei Abweichungen wird gehasht bzw.
+gescannt. --force ignoriert das Manifest.
+
+Die Patches selbst sind deklarativ in scripts/infra_tier_patches.json
+definiert; Team-Varianten per --patches <datei>.
+
+Im Multi-Checkout-Modus ist jeder Checkout eine Transaktion: endet einer
+seiner Patches mit ERROR, wird in diesem Checkout nichts geschrieben (bzw.
+bereits Geschriebenes zurueckgerollt). Am Ende steht eine Summary-Tabelle.
+
+Dieses Script ist nur der Einstieg; die Logik liegt in importierbaren
+Modulen daneben (bekommen ein .pyc, werden erst bei Bedarf geladen):
+  infra_tier_patchset.py  Patch-Set laden/validieren/cachen
+  infra_tier_anchors.py   Anker-Suche in einem Durchlauf
+  infra_tier_codegen.py   generierte Patches (Pfad-Klassifikator)
+  infra_tier_engine.py    Anwenden, Transaktion, Manifest, Multi-Checkout
+  infra_tier_daemon.py    --daemon / --no-daemon
+  infra_tier_bench.py     Subcommand "bench"
+
+Pruef-Harnesses (eigenstaendig lauffaehig, Exit 1 bei Abweichung):
+  infra_tier_check_paths.py  Pfad-Klassifikator gegen die Original-is_*()
+  infra_tier_check_bash.py   Bash-Klassifikator gegen bash / eine Referenzversion
+
+Ohne Argumente prueft das Script zuerst nur per stat() gegen das Manifest
+(manifest_version()); erst wenn dabei etwas abweicht, wird die Engine
+importiert.
+"""
 
-HOOKS_DIR = Path(__file__).parent.parent / ".claude" / "hooks"
-CHANGED = []
+import json
+import os
+import sys
 
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+MANIFEST_HOOKS_DIR = os.path.join(os.path.dirname(SCRIPTS_DIR), ".claude", "hooks")
+MANIFEST_PATCH_FILE = os.path.realpath(os.path.join(SCRIPTS_DIR, "infra_tier_patches.json"))
+MANIFEST_NAME = ".infra_tier.manifest.json"  # wie infra_tier_engine.MANIFEST_NAME
 
-def patch_file(filepath: Path, old: str, new: str, description: str) -> bool:
-    """Replace exact string in file. Returns True if changed."""
-    content = filepath.read_text()
-    if old not in content:
-        if new in content:
-            print(f"  SKIP (already patched): {description}")
-            return False
-        print(f"  ERROR: Could not find target string for: {description}")
-        print(f"  File: {filepath}")
-        return False
 
-    content = content.replace(old, new, 1)
-    filepath.write_text(content)
-    print(f"  OK: {description}")
-    CHANGED.append(filepath.name)
-    return True
+def stat_key(path: str) -> list:
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns, st.st_ino]
 
 
-def main():
-    print("=" * 60)
-    print("Bootstrap: Infrastructure-Tier")
-    print("=" * 60)
-    print()
+def manifest_version(hooks_dir: str = MANIFEST_HOOKS_DIR) -> str:
+    """Patch-set version if the manifest proves the checkout current, else "".
 
-    # ── 1. strict_code_gate.py ──────────────────────────────────
-    print("[1/4] strict_code_gate.py — Infrastructure-Kategorie")
-
-    scg = HOOKS_DIR / "strict_code_gate.py"
-
-    # 1a: Remove .claude/agents/ from ALWAYS_ALLOWED_DIRS
-    patch_file(
-        scg,
-        old='    ".claude/commands/",\n    ".claude/agents/",\n    "scripts/",',
-        new='    ".claude/commands/",\n    "scripts/",',
-        description="Remove .claude/agents/ from ALWAYS_ALLOWED_DIRS"
-    )
-
-    # 1b: Add INFRASTRUCTURE_DIRS after ALWAYS_ALLOWED_DIRS
-    patch_file(
-        scg,
-        old='''# File patterns ALWAYS allowed (whitelist)''',
-        new='''# Infrastructure directories — require __infra__ override token, NOT full workflow
-# These contain workflow enforcement logic itself (chicken-and-egg protection)
-INFRASTRUCTURE_DIRS = [
-    ".claude/hooks/",
-    ".claude/agents/",
-]
-
-# File patterns ALWAYS allowed (whitelist)''',
-        description="Add INFRASTRUCTURE_DIRS list"
-    )
-
-    # 1c: Add is_infrastructure_file function after is_always_allowed
-    patch_file(
-        scg,
-        old='''def is_code_file(file_path: str) -> bool:''',
-        new='''def is_infrastructure_file(file_path: str) -> bool:
-    """Check if file is workflow infrastructure (hooks, agents)."""
-    for infra_dir in INFRASTRUCTURE_DIRS:
-        if infra_dir in file_path:
-            return True
-    return False
-
-
-def is_code_file(file_path: str) -> bool:''',
-        description="Add is_infrastructure_file() function"
-    )
-
-    # 1d: Add infrastructure check before "CODE FILE → Workflow required!"
-    patch_file(
-        scg,
-        old='''    # CODE FILE → Workflow required!''',
-        new='''    # INFRASTRUCTURE FILE → Override token required, but no workflow
-    # Accept ANY valid override token — if user said "override", they approved it
-    if is_infrastructure_file(file_path):
-        if check_user_override(workflow=None, workflow_name="__infra__") or check_user_override():
-            sys.exit(0)
-        print("""
-╔══════════════════════════════════════════════════════════════════╗
-║  BLOCKED: Infrastructure File — Override Required!               ║
-╠══════════════════════════════════════════════════════════════════╣
-║  You're trying to modify workflow infrastructure (hooks/agents). ║
-║                                                                  ║
-║  These files control enforcement logic and need explicit         ║
-║  user approval — but NO full workflow is required.               ║
-║                                                                  ║
-║  REQUIRED: User must type 'override' in chat.                    ║
-║                                                                  ║
-║  This protects against Claude weakening its own enforcement.     ║
-╚══════════════════════════════════════════════════════════════════╝
-""", file=sys.stderr)
-        sys.exit(2)
-
-    # CODE FILE → Workflow required!''',
-        description="Add infrastructure check before workflow check"
-    )
+    Current means: written for the default patch file, every source of the
+    version (patch file, installed modules, engine modules) and every
+    patched file still has the recorded size/mtime/inode. Only a complete
+    run records "sources", so a partly patched checkout never matches.
+    """
+    try:
+        with open(os.path.join(hooks_dir, MANIFEST_NAME), encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest["patch_file"] != MANIFEST_PATCH_FILE or not manifest["sources"]:
+            return ""
+        for path, key in manifest["sources"].items():
+            if stat_key(path) != key:
+                return ""
+        for name, entry in manifest["files"].items():
+            if stat_key(os.path.join(hooks_dir, name)) != [entry["size"], entry["mtime_ns"], entry["inode"]]:
+                return ""
+        return manifest["patch_set_version"]
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return ""
 
-    print()
 
-    # ── 2. override_token_listener.py ───────────────────────────
-    print("[2/4] override_token_listener.py — __infra__ Token ohne Workflow")
-
-    otl = HOOKS_DIR / "override_token_listener.py"
-
-    # 2a: __infra__ fallback when no active workflow
-    patch_file(
-        otl,
-        old='''    else:
-        # No explicit name — fall back to active workflow
-        target_name = session_active_name(state)
-        if not target_name or target_name not in state.get("workflows", {}):
-            print("Override requested but no active workflow found.", file=sys.stderr)
-            sys.exit(0)''',
-        new='''    else:
-        # No explicit name — fall back to active workflow
-        target_name = session_active_name(state)
-        if not target_name or target_name not in state.get("workflows", {}):
-            # No active workflow — create infrastructure token
-            # This allows editing hooks/agents without a full workflow
-            target_name = "__infra__"''',
-        description="Create __infra__ token when no workflow active"
-    )
-
-    # 2b: Accept "override __infra__" as explicit name even though it's not a real workflow
-    patch_file(
-        otl,
-        old='''    if explicit_name:
-        # Explicit workflow name provided — validate it exists
-        if explicit_name not in state.get("workflows", {}):
-            print(f"Override requested for unknown workflow: {explicit_name}", file=sys.stderr)
-            sys.exit(0)
-        target_name = explicit_name''',
-        new='''    if explicit_name:
-        # Special infrastructure token — always allowed without workflow
-        if explicit_name == "__infra__":
-            target_name = "__infra__"
-        # Explicit workflow name provided — validate it exists
-        elif explicit_name not in state.get("workflows", {}):
-            print(f"Override requested for unknown workflow: {explicit_name}", file=sys.stderr)
-            sys.exit(0)
-        else:
-            target_name = explicit_name''',
-        description="Accept __infra__ as explicit override target"
-    )
+def main_multi(roots: list, patch_set, jobs: int, force: bool = False, daemon: bool = None) -> int:
+    from infra_tier_engine import patch_checkouts, print_summary
 
+    print("=" * 60)
+    print(f"Bootstrap: Infrastructure-Tier — {len(roots)} Checkout(s), {jobs} parallel")
+    print("=" * 60)
     print()
 
-    # ── 3. override_token_bash_guard.py ─────────────────────────
-    print("[3/4] override_token_bash_guard.py — workflow_state Bash-Luecke")
-
-    otbg = HOOKS_DIR / "override_token_bash_guard.py"
-
-    patch_file(
-        otbg,
-        old='''    sys.exit(0)
+    checkouts = patch_checkouts(roots, patch_set, jobs, force, daemon)
+    print_summary(checkouts)
 
-
-if __name__ == "__main__":
-    main()''',
-        new='''    # Block direct manipulation of workflow_state.json via Bash.
-    # ALLOWED: workflow_state_multi.py (official CLI tool called by slash commands)
-    # BLOCKED: everything else (python3 -c, echo, cat >, etc.)
-    if "workflow_state" in command and "workflow_state_multi.py" not in command:
-        print(
-            "BLOCKED: workflow_state.json darf nicht direkt via Bash manipuliert werden.\\n"
-            "Nutze das offizielle CLI: python3 .claude/hooks/workflow_state_multi.py\\n"
-            "Zum Lesen nutze das Read-Tool statt Bash.",
-            file=sys.stderr
-        )
-        sys.exit(2)
-
-    sys.exit(0)
+    failed = sum(1 for checkout in checkouts if checkout.rolled_back or checkout.failure)
+    print()
+    print("=" * 60)
+    print(f"DONE — {len(checkouts) - failed} ok, {failed} zurueckgerollt/fehlgeschlagen")
+    print("=" * 60)
+    return 1 if failed else 0
 
 
-if __name__ == "__main__":
-    main()''',
-        description="Block workflow_state in Bash (allow workflow_state_multi.py)"
-    )
+def main():
+    version = "" if sys.argv[1:] else manifest_version()
+    if version:
+        print("=" * 60)
+        print("Bootstrap: Infrastructure-Tier")
+        print("=" * 60)
+        print()
+        print(f"Keine Aenderungen noetig — laut Manifest aktuell (Patch-Set {version}).")
+        print("=" * 60)
+        return
+
+    if sys.argv[1:2] == ["bench"]:
+        from infra_tier_bench import main_bench
+        sys.exit(main_bench(sys.argv[2:]))
+
+    import argparse
+    from pathlib import Path
+
+    from infra_tier_engine import HOOKS_DIR, patch_checkout, report
+    from infra_tier_patchset import DEFAULT_PATCHES, PatchSetError, load_patch_set
+
+    parser = argparse.ArgumentParser(description="Bootstrap: Infrastructure-Tier fuer Workflow-Hooks")
+    parser.add_argument("roots", nargs="*", help="Repo-Roots/Worktrees (Default: dieses Repo)")
+    parser.add_argument("-j", "--jobs", type=int, default=8, help="Parallele Checkouts (Default: 8)")
+    parser.add_argument("--force", action="store_true", help="Manifest ignorieren, alle Dateien neu scannen")
+    parser.add_argument("--patches", type=Path, default=DEFAULT_PATCHES,
+                        help="Patch-Set-Datei (Default: scripts/infra_tier_patches.json)")
+    daemon = parser.add_mutually_exclusive_group()
+    daemon.add_argument("--daemon", dest="daemon", action="store_true", default=None,
+                        help="Hook-Daemon installieren und Guards ueber den Client-Shim leiten")
+    daemon.add_argument("--no-daemon", dest="daemon", action="store_false",
+                        help="Direkte Guard-Kommandos wiederherstellen, Daemon stoppen")
+    args = parser.parse_args()
+
+    try:
+        patch_set = load_patch_set(args.patches)
+    except PatchSetError as e:
+        print(f"ERROR: Patch-Set ungueltig: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.roots:
+        sys.exit(main_multi(args.roots, patch_set, max(1, args.jobs), args.force, args.daemon))
 
+    print("=" * 60)
+    print("Bootstrap: Infrastructure-Tier")
+    print("=" * 60)
     print()
 
-    # ── 4. state_integrity_guard.py ─────────────────────────────
-    print("[4/4] state_integrity_guard.py — Git-Befehle whitelisten")
+    checkout = patch_checkout(HOOKS_DIR, patch_set, transactional=False, force=args.force)
+    if args.daemon is not None:
+        from infra_tier_daemon import set_daemon_mode
+        try:
+            daemon_changes = set_daemon_mode(HOOKS_DIR, patch_set, args.daemon)
+        except OSError as e:
+            print(f"[Daemon] ERROR: {e}")
+        else:
+            mode = "installiert" if args.daemon else "deaktiviert"
+            print(f"[Daemon] {mode}: {', '.join(daemon_changes) or 'bereits aktuell'}")
+        print()
 
-    sig = HOOKS_DIR / "state_integrity_guard.py"
+    if checkout.up_to_date:
+        print(f"Keine Aenderungen noetig — laut Manifest aktuell (Patch-Set {patch_set.version}).")
+        print("=" * 60)
+        return
 
-    # Add early return for git commands before any protected file checks
-    patch_file(
-        sig,
-        old='''    # Quick check: does command reference any protected file?''',
-        new='''    # Git commands are always safe — file modifications were already
-    # approved through Edit/Write guards. Git just stages/commits them.
-    if command.lstrip().startswith("git "):
-        sys.exit(0)
+    results = {id(result.patch): result for result in checkout.results}
 
-    # Quick check: does command reference any protected file?''',
-        description="Early return for git commands"
-    )
+    for index, (title, _filename, patches) in enumerate(patch_set.groups, start=1):
+        print(f"[{index}/{len(patch_set.groups)}] {title}")
+        for patch in patches:
+            report(results[id(patch)])
+        print()
+    if checkout.failure:
+        print(f"ERROR: {checkout.failure}")
+        print()
 
-    print()
     print("=" * 60)
-    if CHANGED:
-        print(f"DONE — {len(CHANGED)} Datei(en) gepatcht: {', '.join(CHANGED)}")
+    if checkout.changed:
+        print(f"DONE — {len(checkout.changed)} Datei(en) gepatcht: {', '.join(checkout.changed)}")
         print()
         print("Naechster Schritt:")
         print("  1. Starte eine neue Claude-Session (oder diese weiter)")
         print("  2. Tippe 'override' wenn du Hook-Aenderungen erlauben willst")
         print("  3. Claude kann dann Hooks editieren — nur mit deiner Freigabe")
+    elif checkout.has_errors or checkout.failure:
+        print("Nichts gepatcht — siehe ERROR oben.")
     else:
         print("Keine Aenderungen noetig — alles bereits gepatcht.")
     print("=" * 60)
@@ -0,0 +1,79 @@
+"""
+Anker-Matcher fuer scripts/bootstrap_infra_tier.py.
+
+Sucht alle Anker (old/new/was-Texte) eines Hook-Files in einem Durchlauf;
+die Regex wird mit dem Patch-Set vorkompiliert (infra_tier_patchset.py).
+"""
+
+import re
+from functools import lru_cache
+
+
+MAX_PREFIX = 64
+
+
+class AnchorMatcher:
+    """Find every occurrence of many anchors in one pass over a text.
+
+    All anchors are cut to a common prefix length and compiled into one
+    trie-shaped regex (the goto function of an Aho-Corasick automaton,
+    run by the C regex engine instead of a Python loop). Each candidate
+    position is then verified against the full anchors sharing that
+    prefix. Overlapping occurrences are reported as well.
+    """
+
+    def __init__(self, anchors, prefix_len: int = None, pattern: str = None):
+        self.anchors = list(dict.fromkeys(anchor for anchor in anchors if anchor))
+        if prefix_len is None:
+            prefix_len = min([MAX_PREFIX] + [len(anchor) for anchor in self.anchors])
+        self.prefix_len = prefix_len
+        self.by_prefix = {}
+        for anchor in self.anchors:
+            self.by_prefix.setdefault(anchor[:self.prefix_len], []).append(anchor)
+        self.pattern = trie_regex(self.by_prefix) if pattern is None else pattern
+        self._regex = None
+
+    def scan(self, text: str, start: int = 0, end: int = None) -> dict:
+        """Return {anchor: [offsets]} for all anchors starting in [start, end)."""
+        hits = {anchor: [] for anchor in self.anchors}
+        if not self.anchors:
+            return hits
+        if self._regex is None:
+            self._regex = re.compile(self.pattern)
+        end = len(text) if end is None else end
+        search = self._regex.search
+        match = search(text, start)
+        while match and match.start() < end:
+            pos = match.start()
+            for anchor in self.by_prefix[match.group()]:
+                if text.startswith(anchor, pos):
+                    hits[anchor].append(pos)
+            match = search(text, pos + 1)
+        return hits
+
+
+def trie_regex(prefixes) -> str:
+    """Compile equal-length literal prefixes into a factored alternation."""
+    trie = {}
+    for prefix in prefixes:
+        node = trie
+        for char in prefix:
+            node = node.setdefault(char, {})
+
+    def emit(node):
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items())]
+        if len(branches) <= 1:
+            return "".join(branches)
+        return "(?:" + "|".join(branches) + ")"
+
+    return emit(trie)
+
+
+@lru_cache(maxsize=None)
+def matcher_for(anchors: tuple) -> AnchorMatcher:
+    """One matcher per anchor set, shared across files and checkouts."""
+    return AnchorMatcher(anchors)
+
+
+def anchors_of(patches: list) -> tuple:
+    return tuple(anchor for patch in patches for anchor in (patch.old, patch.new, *patch.was))
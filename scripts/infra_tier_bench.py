@@ -0,0 +1,302 @@
+"""
+Hook-Benchmark fuer scripts/bootstrap_infra_tier.py (Subcommand "bench").
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from infra_tier_engine import HOOKS_DIR, atomic_write, patch_checkout, unpatch
+from infra_tier_patchset import DEFAULT_PATCHES, PatchSet, PatchSetError, load_patch_set
+
+
+# ── Benchmark ────────────────────────────────────────────────────
+# python3 scripts/bootstrap_infra_tier.py bench [ROOT] [--runs N] [--spawns N]
+#
+# Kopiert .claude/ des Checkouts zweimal in ein Temp-Verzeichnis: "before"
+# (Patches rueckwaerts entfernt) und "after" (Patch-Set angewendet). Jeder
+# gepatchte Hook bekommt synthetische Payloads passend zu seinem Event und
+# wird zweifach gemessen:
+#   - spawn:   echter python3-Prozess pro Aufruf (Interpreter + Imports + Entscheidung)
+#   - in-proc: Hook einmal geladen, main() N-mal ausgefuehrt → Import-Zeit
+#              (erster Aufruf) und p50/p95/p99 der reinen Entscheidung
+# Ergebnisse landen in .claude/hooks/.infra_tier.bench.json (Historie je
+# Patch-Set-Version); der neue Lauf wird mit dem vorherigen verglichen.
+
+BENCH_FILE = ".infra_tier.bench.json"
+BENCH_HISTORY = 50
+
+# Welche Payload-Arten ein Hook bekommt (unbekannte Hooks: alle Tool-Payloads)
+BENCH_PAYLOAD_KINDS = {
+    "strict_code_gate.py": ("edit",),
+    "override_token_listener.py": ("prompt",),
+    "override_token_bash_guard.py": ("bash",),
+    "state_integrity_guard.py": ("bash",),
+}
+
+BENCH_HARNESS = r"""
+import io, json, os, sys, time
+
+hook_path, payload_file, runs = sys.argv[1], sys.argv[2], int(sys.argv[3])
+sys.path.insert(0, os.path.dirname(hook_path))
+with open(hook_path) as f:
+    code = compile(f.read(), hook_path, "exec")
+with open(payload_file) as f:
+    payloads = json.load(f)
+
+real = sys.stdin, sys.stdout, sys.stderr
+
+
+def call(payload):
+    sys.stdin = io.TextIOWrapper(io.BytesIO(payload.encode()))
+    sys.stdout = sys.stderr = io.StringIO()
+    start = time.perf_counter_ns()
+    try:
+        exec(code, {"__name__": "__main__", "__file__": hook_path})
+        status = 0
+    except SystemExit as e:
+        status = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except Exception as e:
+        status = type(e).__name__
+    elapsed = time.perf_counter_ns() - start
+    sys.stdin, sys.stdout, sys.stderr = real
+    return elapsed, status
+
+
+result = {"cold_ns": call(payloads[0][1][0])[0], "payloads": {}}
+for label, items in payloads:
+    timings, exits = [], {}
+    for i in range(runs):
+        elapsed, status = call(items[i % len(items)])
+        timings.append(elapsed)
+        exits[str(status)] = exits.get(str(status), 0) + 1
+    result["payloads"][label] = {"ns": timings, "exit": exits}
+print(json.dumps(result))
+"""
+
+
+def bench_payloads(kinds: tuple) -> list:
+    """Synthetic hook inputs: [(label, [payload JSON, ...]), ...]."""
+    base = {"session_id": "bench-session", "cwd": ".", "transcript_path": "/dev/null"}
+
+    def tool(name, tool_input):
+        return json.dumps(dict(base, hook_event_name="PreToolUse", tool_name=name, tool_input=tool_input))
+
+    def prompt(text):
+        return json.dumps(dict(base, hook_event_name="UserPromptSubmit", prompt=text))
+
+    payloads = []
+    if "edit" in kinds:
+        payloads += [
+            ("edit-small", [tool("Edit", {
+                "file_path": "Sources/Views/BacklogView.swift",
+                "old_string": "let a = 1", "new_string": "let a = 2"})]),
+            ("edit-infra", [tool("Edit", {
+                "file_path": ".claude/hooks/strict_code_gate.py",
+                "old_string": "x = 1", "new_string": "x = 2"})]),
+            ("write-many-paths", [tool("Write", {
+                "file_path": f"packages/mod{i % 97}/Sources/Feature{i}/Sub{i % 13}/File{i}.{ext}",
+                "content": "// generated\n"})
+                for i, ext in zip(range(500), ["swift", "md", "py", "json", "ts"] * 100)]),
+        ]
+    if "bash" in kinds:
+        heredoc = "\n".join(f"line {i}: " + "x" * 72 for i in range(25_000))
+        script = "\n".join(f"rows[{i}] = fmt({i}, 'x' * 32, data.get('k{i}'))" for i in range(60_000))
+        payloads += [
+            ("bash-git", [tool("Bash", {"command": "git status"})]),
+            ("bash-chained", [tool("Bash", {
+                "command": "git add Sources/App.swift && python3 -c 'print(1)' | tee /tmp/out.txt"})]),
+            ("bash-heredoc-2mb", [tool("Bash", {
+                "command": f"cat > /tmp/bench_out.txt <<'EOF'\n{heredoc}\nEOF"})]),
+            ("bash-python-c-3mb", [tool("Bash", {
+                "command": f'python3 -c "{script}"'})]),
+        ]
+    if "prompt" in kinds:
+        payloads += [
+            ("prompt-plain", [prompt("Bitte die Backlog-Ansicht um einen Filter erweitern.")]),
+            ("prompt-override", [prompt("override")]),
+        ]
+    return payloads
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(q / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[rank]
+
+
+def latency_stats(ns_values: list) -> dict:
+    values = sorted(v / 1e6 for v in ns_values)
+    return {f"p{q}": round(percentile(values, q), 4) for q in (50, 95, 99)}
+
+
+def bench_hook(root: Path, hook: Path, payloads: list, runs: int, spawns: int) -> dict:
+    """Measure one hook in one tree: process spawns + in-process decisions."""
+    env = dict(os.environ, CLAUDE_PROJECT_DIR=str(root))
+    spawn_ns = []
+    for _label, items in payloads:
+        for _ in range(spawns):
+            start = time.perf_counter_ns()
+            subprocess.run([sys.executable, str(hook)], input=items[0], cwd=root, env=env,
+                           capture_output=True, text=True)
+            spawn_ns.append(time.perf_counter_ns() - start)
+
+    payload_file = root / ".bench_payloads.json"
+    payload_file.write_text(json.dumps(payloads))
+    proc = subprocess.run([sys.executable, "-c", BENCH_HARNESS, str(hook), str(payload_file), str(runs)],
+                          cwd=root, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{hook.name}: Harness fehlgeschlagen:\n{proc.stderr.strip()}")
+    measured = json.loads(proc.stdout)
+
+    all_ns = [ns for data in measured["payloads"].values() for ns in data["ns"]]
+    return dict(
+        latency_stats(all_ns),
+        cold_ms=round(measured["cold_ns"] / 1e6, 3),
+        spawn=latency_stats(spawn_ns),
+        payloads={
+            label: dict(latency_stats(data["ns"]), exit=data["exit"])
+            for label, data in measured["payloads"].items()
+        },
+    )
+
+
+def run_benchmark(root: Path, patch_set: PatchSet, runs: int, spawns: int) -> dict:
+    """Benchmark every hook of the patch set before and after patching."""
+    hook_names = list(dict.fromkeys(filename for _title, filename, _patches in patch_set.groups))
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="infra_tier_bench.") as tmp:
+        trees = {}
+        for phase in ("before", "after"):
+            trees[phase] = Path(tmp) / phase
+            shutil.copytree(root / ".claude", trees[phase] / ".claude", symlinks=True,
+                            ignore=shutil.ignore_patterns("__pycache__", "*.sock", BENCH_FILE))
+        unpatch(trees["before"] / ".claude" / "hooks", patch_set)
+        # Nicht transaktional: ein fehlender Hook soll die uebrigen nicht ungepatcht lassen
+        patch_checkout(trees["after"] / ".claude" / "hooks", patch_set, transactional=False, force=True)
+
+        for name in hook_names:
+            payloads = bench_payloads(BENCH_PAYLOAD_KINDS.get(name, ("edit", "bash")))
+            phases = {}
+            for phase, tree in trees.items():
+                hook = tree / ".claude" / "hooks" / name
+                if hook.exists():
+                    phases[phase] = bench_hook(tree, hook, payloads, runs, spawns)
+            if phases:  # Hook fehlt im Checkout: nichts zu messen
+                results[name] = phases
+    return results
+
+
+def print_bench(results: dict, previous: dict = None) -> None:
+    header = ("Hook", "Phase", "Spawn p50", "Import", "p50", "p95", "p99", "vs. vorher p95")
+    rows = []
+    for name, phases in results.items():
+        if not phases:
+            continue
+        for phase, stats in phases.items():
+            delta = ""
+            before = (previous or {}).get("hooks", {}).get(name, {}).get(phase)
+            if before:
+                delta = f"{stats['p95'] - before['p95']:+.3f} ms"
+            rows.append((
+                name if phase == "before" or "before" not in phases else "",
+                phase,
+                f"{stats['spawn']['p50']:.1f} ms",
+                f"{stats['cold_ms']:.2f} ms",
+                f"{stats['p50']:.3f}",
+                f"{stats['p95']:.3f}",
+                f"{stats['p99']:.3f} ms",
+                delta,
+            ))
+
+    widths = [max(len(row[i]) for row in rows + [header]) for i in range(len(header))]
+    line = "  ".join("{:<%d}" % w for w in widths)
+    print(line.format(*header).rstrip())
+    print("  ".join("-" * w for w in widths))
+    for row in rows:
+        print(line.format(*row).rstrip())
+
+    print()
+    print("Entscheidungs-Latenz je Payload (after, p95):")
+    for name, phases in results.items():
+        stats = phases.get("after") or phases.get("before")
+        if not stats:
+            continue
+        for label, payload_stats in stats["payloads"].items():
+            exits = ", ".join(f"exit {code}: {count}" for code, count in sorted(payload_stats["exit"].items()))
+            print(f"  {name:<32} {label:<18} {payload_stats['p95']:>9.3f} ms   ({exits})")
+
+
+def main_bench(argv: list) -> int:
+    parser = argparse.ArgumentParser(prog="bootstrap_infra_tier.py bench",
+                                     description="Latenz der gepatchten Hooks vor/nach dem Patchen messen")
+    parser.add_argument("root", nargs="?", type=Path, default=HOOKS_DIR.parent.parent,
+                        help="Repo-Root/Worktree (Default: dieses Repo)")
+    parser.add_argument("--runs", type=int, default=200, help="In-Process-Aufrufe je Payload (Default: 200)")
+    parser.add_argument("--spawns", type=int, default=10, help="Prozess-Starts je Payload (Default: 10)")
+    parser.add_argument("--patches", type=Path, default=DEFAULT_PATCHES,
+                        help="Patch-Set-Datei (Default: scripts/infra_tier_patches.json)")
+    parser.add_argument("--output", type=Path, help="Ergebnis-Historie (Default: .claude/hooks/.infra_tier.bench.json)")
+    args = parser.parse_args(argv)
+
+    try:
+        patch_set = load_patch_set(args.patches)
+    except PatchSetError as e:
+        print(f"ERROR: Patch-Set ungueltig: {e}", file=sys.stderr)
+        return 1
+
+    root = args.root.resolve()
+    if not (root / ".claude" / "hooks").is_dir():
+        print(f"ERROR: {root}/.claude/hooks nicht gefunden", file=sys.stderr)
+        return 1
+    output = args.output or root / ".claude" / "hooks" / BENCH_FILE
+
+    print("=" * 60)
+    print(f"Benchmark: Infrastructure-Tier Hooks (Patch-Set {patch_set.version})")
+    print("=" * 60)
+    print()
+
+    try:
+        results = run_benchmark(root, patch_set, max(1, args.runs), max(1, args.spawns))
+    except RuntimeError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+
+    try:
+        history = json.loads(output.read_text())
+    except (OSError, ValueError):
+        history = []
+    history = history if isinstance(history, list) else []
+    previous = history[-1] if history else None
+
+    history.append({
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "patch_set": patch_set.name,
+        "patch_set_version": patch_set.version,
+        "python": sys.version.split()[0],
+        "runs": args.runs,
+        "spawns": args.spawns,
+        "hooks": results,
+    })
+    # Erst speichern, dann ausgeben — die Messung geht nie verloren
+    atomic_write(output, json.dumps(history[-BENCH_HISTORY:], indent=2) + "\n")
+
+    print_bench(results, previous)
+    if previous:
+        print()
+        print(f"Vergleich mit Lauf vom {previous.get('timestamp')} (Patch-Set {previous.get('patch_set_version')})")
+    missing = [name for _title, name, _patches in patch_set.groups if name not in results]
+    if missing:
+        print(f"Nicht im Checkout (nicht gemessen): {', '.join(dict.fromkeys(missing))}")
+    print()
+    print(f"Gespeichert: {output}")
+    print("=" * 60)
+    return 0
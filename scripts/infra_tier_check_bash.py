@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Fuzz-/Differential-Check fuer den Bash-Klassifikator (infra_bash.py).
+
+  python3 scripts/infra_tier_check_bash.py [--cases 5000] [--seed N] [--reference ALT/infra_bash.py]
+
+Feste Faelle fuer only_git (Umgebungs-Praefixe wie GIT_EDITOR=... git commit
+duerfen nie als reiner git-Aufruf gelten), dann drei Pruefungen auf zufaellig
+erzeugten Kommandos:
+  - bash:      Woerter und Redirects je Teilkommando gegen das, was bash
+               selbst daraus macht (printf '%s\\0' ... mit Quotes, Escapes,
+               ;/&&/Zeilenumbruch, fd-Redirects); Heredoc-Spannen gegen die
+               Ausgabe von cat <<'EOF' (auch <<- und mehrere je Zeile)
+  - reference: mit --reference eine zweite infra_bash.py (z.B. per
+               `git show <rev>:scripts/infra_tier_hooks/infra_bash.py`)
+               auf einem breiteren Korpus (Operatoren, Substitutions,
+               Heredocs, workflow_state-Nennungen, Kommandos ohne
+               Sonderzeichen fuer den str.split()-Weg) — Segmente und Verdicts
+               muessen identisch sein
+  - timing:    grosse Payloads (MB-Heredoc, python3 -c "...", lange Woerter)
+Exit 0 ohne Abweichung, sonst 1. Ohne bash im PATH entfaellt die erste Pruefung.
+"""
+
+import argparse
+import importlib.util
+import random
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from infra_tier_patchset import HOOK_SOURCES
+
+PLAIN = "abcxyzXYZ019_-.,/:=@%+"
+IN_SINGLE = PLAIN + " \t\"\\$`;|&()<>#*\n"
+IN_DOUBLE = PLAIN + " \t';|&()<>#*\n"
+DOUBLE_ESCAPES = ("\\\\", "\\\"", "\\$", "\\`", "\\\n", "\\x", "\\'")
+ESCAPED = PLAIN + " \t'\"\\;|&()<>$`#*\n"
+SEPARATORS = (";", " && ", "\n", " ;\t")
+BLANKS = (" ", "\t", "  ", "\r", "\x0b\x0c", "\u00a0")
+FD_REDIRECTS = ("2>/dev/null", "2>&1", "3>/dev/null")
+SHOW_MISMATCHES = 10
+
+# (Kommando, only_git): ein VAR=...-Praefix macht aus git ein beliebiges Programm
+ONLY_GIT_CASES = (
+    ("git status", True),
+    ("git add x && git commit -m 'y'", True),
+    ("git diff 2>/dev/null | git apply", True),
+    ('GIT_EDITOR="cp /tmp/x .claude/hooks/strict_code_gate.py" git commit', False),
+    ("PATH=/tmp/evil:$PATH git status", False),
+    ("GIT_SSH_COMMAND='sh -c \"cp x y\"' git push", False),
+    ("git add x && GIT_EDITOR=vi git commit", False),
+    ("env GIT_EDITOR=vi git commit", False),
+    ("time git status", False),
+    ("git log > /tmp/out", False),
+    ('git commit -m "$(cat msg)"', False),
+)
+TIMING_BUDGET_MS = 500
+
+
+def load_module(path: Path, name: str):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# ── Generator ────────────────────────────────────────────────────
+
+def random_text(rng, alphabet: str, low: int = 0, high: int = 6) -> str:
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(low, high)))
+
+
+def random_word(rng) -> tuple:
+    """(shell source, value bash gives it) for one word of 1-4 pieces."""
+    source, value = [], []
+    for _ in range(rng.randint(1, 4)):
+        kind = rng.randrange(4)
+        if kind == 0:
+            text = random_text(rng, PLAIN, 1)
+            source.append(text)
+            value.append(text)
+        elif kind == 1:
+            text = random_text(rng, IN_SINGLE)
+            source.append(f"'{text}'")
+            value.append(text)
+        elif kind == 2:
+            parts = [rng.choice(DOUBLE_ESCAPES) if rng.random() < 0.3 else rng.choice(IN_DOUBLE)
+                     for _ in range(rng.randint(0, 6))]
+            source.append('"' + "".join(parts) + '"')
+            value.append("".join(
+                "" if part == "\\\n" else part[1] if part in DOUBLE_ESCAPES[:4] else part for part in parts))
+        else:
+            char = rng.choice(ESCAPED)
+            source.append("\\" + char)
+            value.append("" if char == "\n" else char)
+    return "".join(source), "".join(value)
+
+
+def random_printf(rng) -> tuple:
+    """(source, words, redirects) of one printf call bash can replay."""
+    source, words, redirects = ["printf '%s\\0' ^"], [], []
+    for _ in range(rng.randint(0, 5)):
+        blank = rng.choice((" ", "\t", "  "))
+        if rng.random() < 0.15:
+            redirect = rng.choice(FD_REDIRECTS)
+            source.append(blank + redirect)
+            op, _sep, target = redirect.partition(">")
+            redirects.append((op + ">" + ("&" if target.startswith("&") else ""), target.lstrip("&")))
+        elif rng.random() < 0.1:
+            digits = random_text(rng, "0123456789", 1, 2)
+            source.append(blank + digits)
+            words.append(digits)
+        else:
+            word_source, value = random_word(rng)
+            source.append(blank + word_source)
+            if word_source.replace("\\\n", ""):  # nur Zeilenfortsetzungen: kein Wort
+                words.append(value)
+    return "".join(source), words, redirects
+
+
+def random_heredocs(rng) -> tuple:
+    """(source, bodies as cat prints them) for one line with 1-3 heredocs."""
+    heads, bodies, expected = [], [], []
+    for i in range(rng.randint(1, 3)):
+        delimiter = rng.choice(("EOF", "END_X", "e1"))
+        strip = rng.random() < 0.4
+        quoted = rng.choice((f"'{delimiter}'", f'"{delimiter}"', f"\\{delimiter}"))
+        heads.append(f"cat <<{'-' if strip else ''}{quoted}")
+        lines = [("\t" * rng.randint(0, 2) if strip else "")
+                 + random_text(rng, PLAIN + " '\"$`\\<>|;&" + delimiter, 0, 12)
+                 for _ in range(rng.randint(0, 4))]
+        lines = [line for line in lines if line.lstrip("\t") != delimiter]
+        bodies.append("".join(line + "\n" for line in lines) + ("\t" if strip and rng.random() < 0.5 else "")
+                      + delimiter + "\n")
+        expected.append("".join((line.lstrip("\t") if strip else line) + "\n" for line in lines))
+    return "; ".join(heads) + "\n" + "".join(bodies), expected
+
+
+def random_command(rng) -> str:
+    """Broader corpus for the reference comparison (need not be valid shell)."""
+    if rng.random() < 0.2:
+        # Nur Woerter und Blanks: split_command nimmt dafuer str.split() statt der Token-Regex
+        return "".join(rng.choice(BLANKS) + rng.choice((random_text(rng, PLAIN + "#*~!", 1), "git", "status", "x=1"))
+                       for _ in range(rng.randint(0, 6))) + rng.choice(("",) + BLANKS)
+    pieces = [
+        lambda: random_word(rng)[0], lambda: random_text(rng, "0123456789", 1, 2),
+        lambda: rng.choice(("&&", "||", ";", "|", "&", "(", ")", ";;", "|&")),
+        lambda: rng.choice((">", ">>", "2>&1", "<", "&>", ">|", "<<<", "3<&-", "<>")),
+        lambda: rng.choice(("$(", "`", "<(", ">(", "$", "$'a\\'b'", "${x}")),
+        lambda: rng.choice(("git", "add", "commit", "-C", "python3", "-c", "-m", "sed", "-i", "tee", "cat", "x=1")),
+        lambda: rng.choice(("workflow_state.json", ".claude/workflow_state.json", "workflow_state_multi.py",
+                            ".claude/hooks/workflow_state_multi.py", "workflow_state_multi.pyworkflow_state")),
+        lambda: random_heredocs(rng)[0], lambda: "\n",
+    ]
+    return "".join(rng.choice((" ", "", "\t")) + rng.choice(pieces)() for _ in range(rng.randint(1, 12)))
+
+
+# ── Pruefungen ───────────────────────────────────────────────────
+
+def check_only_git(module) -> int:
+    mismatches = 0
+    for command, expected in ONLY_GIT_CASES:
+        got = module.CommandVerdict(command).only_git
+        if got != expected:
+            mismatches += report_mismatch(mismatches, "only_git", command, f"erwartet {expected}, bekommen {got}")
+    return mismatches
+
+
+def check_against_bash(bash_module, rng, cases: int) -> int:
+    commands = []
+    for _ in range(cases):
+        calls = [random_printf(rng) for _ in range(rng.randint(1, 3))]
+        separators = [rng.choice(SEPARATORS) for _ in calls[1:]]
+        source = calls[0][0] + "".join(sep + call[0] for sep, call in zip(separators, calls[1:]))
+        commands.append((source, calls))
+    script = "set -f\n" + "".join(f"{source}\nprintf '\\1'\n" for source, _calls in commands)
+    output = subprocess.run(["bash", "-s"], input=script.encode(), capture_output=True).stdout.decode()
+    replayed = output.split("\1")[:-1]
+
+    mismatches = 0
+    for (source, calls), printed in zip(commands, replayed):
+        expected = [(words, redirects) for _source, words, redirects in calls]
+        segments = bash_module.split_command(source)
+        got = [(segment.words[3:], segment.redirects) for segment in segments]
+        bash_words = [word for word in printed.split("\0")[:-1] if word != "^"]
+        if got != expected or bash_words != [word for words, _r in expected for word in words]:
+            mismatches += report_mismatch(mismatches, "bash", source, f"bash {bash_words!r}, geparst {got!r}")
+
+    for _ in range(cases // 5):
+        source, expected = random_heredocs(rng)
+        printed = subprocess.run(["bash", "-c", source], capture_output=True).stdout.decode()
+        segments = bash_module.split_command(source)
+        spans = [source[start:end] for segment in segments for start, end in segment.heredocs]
+        stripped = ["".join(line.lstrip("\t") for line in span.splitlines(True)) if "<<-" in head else span
+                    for head, span in zip([h for h in source.split("\n", 1)[0].split("; ")], spans)]
+        if printed != "".join(expected) or stripped != expected:
+            mismatches += report_mismatch(mismatches, "heredoc", source, f"bash {printed!r}, Spannen {spans!r}")
+    return mismatches
+
+
+def describe(module, command: str) -> tuple:
+    verdict = module.CommandVerdict(command)
+    return (
+        [(s.words, s.redirects, [command[a:b] for a, b in s.heredocs], s.substitution) for s in verdict.segments],
+        verdict.only_git, verdict.git_subcommands,
+        [s.cli for s in verdict.mentioning("workflow_state", ("workflow_state_multi.py",))],
+        [s.writes for s in verdict.segments],
+    )
+
+
+def check_against_reference(module, reference, rng, cases: int) -> int:
+    mismatches = 0
+    for _ in range(cases):
+        command = random_command(rng)
+        expected, got = describe(reference, command), describe(module, command)
+        if got != expected:
+            mismatches += report_mismatch(mismatches, "reference", command, f"erwartet {expected!r}, bekommen {got!r}")
+    return mismatches
+
+
+def report_mismatch(count: int, check: str, command: str, detail: str) -> int:
+    if count < SHOW_MISMATCHES:
+        print(f"MISMATCH {check}: {command[:200]!r}\n  {detail[:400]}")
+    return 1
+
+
+def timing(module) -> int:
+    code = "\n".join(f"x{i} = compute({i}, 'arg', data[{i}])  # line {i}" for i in range(70_000))
+    payloads = {
+        "heredoc 2 MB": "cat > /tmp/out.txt <<'EOF'\n" + "\n".join("x" * 80 for _ in range(25_000)) + "\nEOF",
+        "python3 -c \"...\" 4 MB": f'python3 -c "{code}"',
+        "python3 -c '...' 4 MB": f"python3 -c '{code}'",
+        "python3 -c \"\\\"...\\\"\" 4 MB": 'python3 -c "' + code.replace("'", '\\"') + '"',
+        "echo <Woerter> 4 MB": "echo " + code.translate(str.maketrans("\n", " ", "()'#")),
+        "printf <Wort> 3 MB": "printf %s " + "a" * 3_000_000,
+    }
+    slow = 0
+    for label, command in payloads.items():
+        start = time.perf_counter()
+        module.CommandVerdict(command).mentioning("workflow_state", ("workflow_state_multi.py",))
+        elapsed = (time.perf_counter() - start) * 1000
+        slow += elapsed > TIMING_BUDGET_MS
+        print(f"  {label:26} {elapsed:8.1f} ms{'  (> Budget)' if elapsed > TIMING_BUDGET_MS else ''}")
+    return slow
+
+
+def main(argv: list) -> int:
+    parser = argparse.ArgumentParser(description="Bash-Klassifikator gegen bash bzw. eine Referenzversion pruefen")
+    parser.add_argument("--cases", type=int, default=5000, help="Zufallskommandos je Pruefung (Default: 5000)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--reference", type=Path, help="andere infra_bash.py zum Vergleich")
+    parser.add_argument("--module", type=Path, default=HOOK_SOURCES / "infra_bash.py", help="zu pruefende infra_bash.py")
+    args = parser.parse_args(argv)
+
+    module = load_module(args.module, "infra_bash")
+    rng = random.Random(args.seed)
+    failures = check_only_git(module)
+    print(f"only_git:  {len(ONLY_GIT_CASES)} feste Faelle, {failures} Abweichung(en)")
+
+    if shutil.which("bash"):
+        mismatches = check_against_bash(module, rng, args.cases)
+        print(f"bash:      {args.cases} Kommandos + {args.cases // 5} Heredocs, {mismatches} Abweichung(en)")
+        failures += mismatches
+    else:
+        print("bash:      uebersprungen (bash nicht gefunden)")
+
+    if args.reference:
+        reference = load_module(args.reference, "infra_bash_reference")
+        mismatches = check_against_reference(module, reference, rng, args.cases)
+        print(f"reference: {args.cases} Kommandos gegen {args.reference}, {mismatches} Abweichung(en)")
+        failures += mismatches
+
+    print(f"timing (Budget {TIMING_BUDGET_MS} ms je Payload):")
+    failures += timing(module)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Differential-Check fuer den generierten Pfad-Klassifikator (infra_paths.py).
+
+  python3 scripts/infra_tier_check_paths.py [STRICT_CODE_GATE] [--paths 200000] [--seed N]
+
+Liest strict_code_gate.py (Default: .claude/hooks/ dieses Repos), fuehrt die
+Original-Funktionen is_always_allowed / is_infrastructure_file / is_code_file
+samt ihrer Listen aus und vergleicht sie auf zufaelligen Pfaden (gebaut aus
+den Listenwerten und Fuellstuecken) mit dem Block, den infra_tier_codegen
+heute generieren wuerde:
+  - direkt: Regeln per `in` / startswith / endswith (Pfad eines Einzel-Hooks)
+  - regex:  kompilierte Lookahead-Regex (Pfad nach COMPILE_AFTER Lookups)
+  - ohne infra_paths.py: der Block muss die Original-Funktionen stehen lassen
+Exit 0 ohne Abweichung, sonst 1.
+"""
+
+import argparse
+import ast
+import random
+import re
+import sys
+from pathlib import Path
+
+from infra_tier_codegen import CLASSIFIER_BEGIN, CLASSIFIER_END, PATH_PREDICATES, path_classifier_patch, string_lists
+from infra_tier_patchset import HOOK_SOURCES, Patch
+
+DEFAULT_GATE = Path(__file__).resolve().parent.parent / ".claude" / "hooks" / "strict_code_gate.py"
+FILLERS = ("", "a", "/", ".", "..", "-", " ", "\n", "src/", "Sources/", "py", "swift", "md", "json", "ts", "x.")
+MAX_PIECES = 6
+SHOW_MISMATCHES = 10
+
+
+def original_predicates(tree: ast.Module) -> dict:
+    """Namespace with the string lists and the original is_*() functions only."""
+    lists = string_lists(tree)
+    nodes = [
+        node for node in tree.body
+        if (isinstance(node, ast.FunctionDef) and node.name in PATH_PREDICATES.values())
+        or (isinstance(node, (ast.Assign, ast.AnnAssign))
+            and any(isinstance(t, ast.Name) and t.id in lists
+                    for t in (node.targets if isinstance(node, ast.Assign) else [node.target])))
+    ]
+    namespace = {"__name__": "strict_code_gate"}
+    exec(compile(ast.Module(nodes, type_ignores=[]), "strict_code_gate.py", "exec"), namespace)
+    return namespace
+
+
+def with_block(original: dict, block: str) -> dict:
+    namespace = dict(original)
+    exec(compile(block, "<generierter Block>", "exec"), namespace)
+    return namespace
+
+
+def random_paths(needles: list, count: int, seed: int):
+    rng = random.Random(seed)
+    pieces = needles + list(FILLERS)
+    for _ in range(count):
+        yield "".join(rng.choice(pieces) for _ in range(rng.randint(0, MAX_PIECES)))
+
+
+def main(argv: list) -> int:
+    parser = argparse.ArgumentParser(description="Generierten Pfad-Klassifikator gegen die Original-Funktionen pruefen")
+    parser.add_argument("gate", nargs="?", type=Path, default=DEFAULT_GATE, help="strict_code_gate.py")
+    parser.add_argument("--paths", type=int, default=200_000, help="Zufallspfade (Default: 200000)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    try:
+        content = args.gate.read_text(encoding="utf-8")
+    except OSError as e:
+        print(f"ERROR: {args.gate}: {e.strerror}", file=sys.stderr)
+        return 1
+    # Bereits generierten Block entfernen: geprueft wird gegen die Originale
+    content = re.sub(re.escape(CLASSIFIER_BEGIN) + ".*?" + re.escape(CLASSIFIER_END) + r"\n*", "", content,
+                     flags=re.DOTALL)
+    try:
+        block = path_classifier_patch(content, Patch(args.gate.name, "", "", "check")).new
+    except ValueError as e:
+        print(f"ERROR: {args.gate}: {e}", file=sys.stderr)
+        return 1
+    original = original_predicates(ast.parse(content))
+    names = [name for name in PATH_PREDICATES.values() if name in original]
+
+    sys.path.insert(0, str(HOOK_SOURCES))
+    import infra_paths
+
+    # Ohne infra_paths.py: ImportError → Originale bleiben
+    sys.modules["infra_paths"] = None
+    try:
+        fallback = with_block(original, block)
+    finally:
+        sys.modules["infra_paths"] = infra_paths
+    failures = [name for name in names if fallback[name] is not original[name]]
+    for name in failures:
+        print(f"MISMATCH ohne infra_paths.py: {name} ersetzt")
+
+    infra_paths.COMPILE_AFTER = float("inf")
+    infra_paths.SHARED.clear()
+    direct = with_block(original, block)
+    infra_paths.SHARED.clear()
+    compiled = with_block(original, block)
+    compiled["PATH_CLASSIFIER"].compile()
+
+    needles = sorted({value for name, node in string_lists(ast.parse(content)).items() for value in
+                      (e.value for e in node.elts)})
+    mismatches = 0
+    for path in random_paths(needles, args.paths, args.seed):
+        for name in names:
+            expected = bool(original[name](path))
+            for view, namespace in (("direkt", direct), ("regex", compiled)):
+                if namespace[name](path) != expected:
+                    mismatches += 1
+                    if mismatches <= SHOW_MISMATCHES:
+                        print(f"MISMATCH {view} {name}({path!r}): erwartet {expected}")
+
+    print(f"{args.paths} Pfade x {len(names)} Funktionen: {mismatches} Abweichung(en), "
+          f"Fallback ohne infra_paths.py: {'FEHLER' if failures else 'ok'}")
+    return 1 if mismatches or failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,210 @@
+"""
+Generierte Patches fuer scripts/bootstrap_infra_tier.py.
+
+Ein Patch mit "generate": <Name> im Patch-Set bekommt seinen Ersatztext erst
+beim Anwenden, erzeugt aus dem aktuellen Inhalt der Zieldatei (GENERATORS).
+"""
+
+import ast
+import re
+
+from infra_tier_patchset import Patch
+
+
+# ── Generierte Patches ───────────────────────────────────────────
+# path_classifier: leitet aus is_always_allowed / is_infrastructure_file /
+# is_code_file in strict_code_gate.py Regeln ab (per AST, erkannt werden
+# `x in path`, path.startswith/endswith(...) ueber Listen oder Literale, als
+# for-Schleife, any(...) oder or-Kette) und fuegt vor dem Anker einen Block
+# ein, der die drei Funktionen durch Sichten auf einen infra_paths.
+# PathClassifier ersetzt. Listen werden per Name referenziert (gelesen beim
+# Laden des Hooks); nicht erkannte Funktionen laufen als Fallback weiter.
+# Der Block importiert infra_paths in try/except: ohne das Modul gelten die
+# Original-Funktionen unveraendert.
+
+PATH_PREDICATES = {
+    "always-allowed": "is_always_allowed",
+    "infrastructure": "is_infrastructure_file",
+    "code": "is_code_file",
+}
+CLASSIFIER_BEGIN = "# ── Pfad-Klassifikator (generiert von scripts/bootstrap_infra_tier.py) ──"
+CLASSIFIER_END = "# ── Ende Pfad-Klassifikator ──"
+
+
+def string_lists(tree: ast.Module) -> dict:
+    """Module-level names bound exactly once to a list/tuple of str literals."""
+    bound = {}
+    for node in tree.body:
+        targets = node.targets if isinstance(node, ast.Assign) else [getattr(node, "target", None)]
+        for target in targets:
+            if isinstance(target, ast.Name):
+                bound.setdefault(target.id, []).append(getattr(node, "value", None))
+    return {
+        name: values[0]
+        for name, values in bound.items()
+        if len(values) == 1 and isinstance(values[0], (ast.List, ast.Tuple))
+        and all(isinstance(e, ast.Constant) and isinstance(e.value, str) for e in values[0].elts)
+    }
+
+
+def needles_source(node, lists: dict):
+    """Source text for the needles of a rule: a list name or a literal tuple."""
+    if isinstance(node, ast.Name) and node.id in lists:
+        return node.id
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == "tuple" \
+            and len(node.args) == 1 and not node.keywords:
+        return needles_source(node.args[0], lists)
+    if isinstance(node, (ast.List, ast.Tuple)) and all(
+            isinstance(e, ast.Constant) and isinstance(e.value, str) for e in node.elts):
+        return repr(tuple(e.value for e in node.elts))
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return repr((node.value,))
+    return None
+
+
+def test_rule(test, param: str, var: str, needles: str, lists: dict):
+    """(kind, needles) for `needle in param` / param.startswith|endswith(needle).
+
+    Inside a loop (var set) the needle must be the loop variable; otherwise
+    it must be a literal (a str, or for startswith/endswith a str tuple).
+    """
+    if isinstance(test, ast.Compare) and len(test.ops) == 1 and isinstance(test.ops[0], ast.In) \
+            and isinstance(test.comparators[0], ast.Name) and test.comparators[0].id == param:
+        kind, node = "contains", test.left
+    elif isinstance(test, ast.Call) and isinstance(test.func, ast.Attribute) \
+            and test.func.attr in ("startswith", "endswith") \
+            and isinstance(test.func.value, ast.Name) and test.func.value.id == param \
+            and len(test.args) == 1 and not test.keywords:
+        kind, node = test.func.attr, test.args[0]
+    else:
+        return None
+
+    if var:
+        return (kind, needles) if isinstance(node, ast.Name) and node.id == var else None
+    if isinstance(node, ast.Constant) or (kind != "contains" and not isinstance(node, ast.Name)):
+        source = needles_source(node, lists)
+        return (kind, source) if source else None
+    return None
+
+
+def expression_rules(expr, param: str, lists: dict):
+    """Rules for a boolean expression over the path, or None if unknown."""
+    if isinstance(expr, ast.BoolOp) and isinstance(expr.op, ast.Or):
+        rules = [expression_rules(value, param, lists) for value in expr.values]
+        return None if None in rules else [rule for part in rules for rule in part]
+    if isinstance(expr, ast.Call) and isinstance(expr.func, ast.Name) and expr.func.id == "any" \
+            and len(expr.args) == 1 and isinstance(expr.args[0], ast.GeneratorExp) and not expr.keywords:
+        generators = expr.args[0].generators
+        if len(generators) != 1 or generators[0].ifs or generators[0].is_async \
+                or not isinstance(generators[0].target, ast.Name):
+            return None
+        var = generators[0].target.id
+        needles = needles_source(generators[0].iter, lists)
+        rule = needles and var != param and test_rule(expr.args[0].elt, param, var, needles, lists)
+        return [rule] if rule else None
+    rule = test_rule(expr, param, None, None, lists)
+    return [rule] if rule else None
+
+
+def returns_true(body: list) -> bool:
+    return len(body) == 1 and isinstance(body[0], ast.Return) \
+        and isinstance(body[0].value, ast.Constant) and body[0].value.value is True
+
+
+def predicate_rules(func: ast.FunctionDef, lists: dict):
+    """Rules equivalent to a simple path predicate, or None if its shape is unknown."""
+    args = func.args
+    if func.decorator_list or len(args.args) != 1 or args.posonlyargs or args.vararg \
+            or args.kwonlyargs or args.kwarg:
+        return None
+    param = args.args[0].arg
+    body = func.body
+    if isinstance(body[0], ast.Expr) and isinstance(body[0].value, ast.Constant):
+        body = body[1:]  # docstring
+    if not body or not isinstance(body[-1], ast.Return) or body[-1].value is None:
+        return None
+
+    rules = []
+    for stmt in body[:-1]:
+        if isinstance(stmt, ast.If) and not stmt.orelse and returns_true(stmt.body):
+            found = expression_rules(stmt.test, param, lists)
+        elif isinstance(stmt, ast.For) and not stmt.orelse and isinstance(stmt.target, ast.Name) \
+                and stmt.target.id != param and len(stmt.body) == 1 and isinstance(stmt.body[0], ast.If) \
+                and not stmt.body[0].orelse and returns_true(stmt.body[0].body):
+            needles = needles_source(stmt.iter, lists)
+            rule = needles and test_rule(stmt.body[0].test, param, stmt.target.id, needles, lists)
+            found = [rule] if rule else None
+        else:
+            found = None
+        if found is None:
+            return None
+        rules += found
+
+    last = body[-1].value
+    if isinstance(last, ast.Constant) and last.value is False:
+        return rules
+    found = expression_rules(last, param, lists)
+    return None if found is None else rules + found
+
+
+def path_classifier_patch(content: str, patch: Patch) -> Patch:
+    """Generate the classifier block for strict_code_gate.py, before patch.old."""
+    try:
+        tree = ast.parse(content)
+    except SyntaxError as e:
+        raise ValueError(f"Datei nicht parsebar ({e.msg}, Zeile {e.lineno})") from None
+    lists = string_lists(tree)
+    functions = {node.name: node for node in tree.body if isinstance(node, ast.FunctionDef)}
+
+    rules = []
+    fallbacks = []
+    for category, name in PATH_PREDICATES.items():
+        if name not in functions:
+            continue
+        found = predicate_rules(functions[name], lists)
+        if found is None:
+            fallbacks.append(f"            {category!r}: {name},")
+        else:
+            rule_text = ", ".join(f"({kind!r}, {needles})" for kind, needles in found)
+            rules.append(f"            {category!r}: [{rule_text}],")
+    if not rules and not fallbacks:
+        raise ValueError(f"keine der Funktionen {', '.join(PATH_PREDICATES.values())} gefunden")
+
+    lines = [
+        CLASSIFIER_BEGIN,
+        "# Ersetzt die linearen Listen-Scans der is_*()-Checks durch einen kompilierten",
+        "# Lookup mit LRU-Cache (infra_paths.py). Nach Aenderungen an diesen",
+        "# Funktionen den Bootstrap erneut ausfuehren. Fehlt infra_paths.py, bleiben",
+        "# die Original-Funktionen aktiv (der Gate darf nie mit Exit 1 durchlassen).",
+        "try:",
+        "    from infra_paths import PathClassifier",
+        "except ImportError:",
+        "    pass",
+        "else:",
+        "    PATH_CLASSIFIER = PathClassifier.shared(",
+        "        {",
+        *rules,
+        "        },",
+    ]
+    if fallbacks:
+        lines += ["        fallbacks={", *fallbacks, "        },"]
+    lines.append("    )")
+    for category, name in PATH_PREDICATES.items():
+        if name in functions:
+            lines.append(f"    {name} = PATH_CLASSIFIER.predicate({category!r})")
+    block = "\n".join(lines + [CLASSIFIER_END, "", "", ""])
+
+    # Ein frueher generierter Block ist eine fruehere Version von `new`: per
+    # `was` wird er beim Anwenden ersetzt und beim Unpatch mit entfernt
+    was = ()
+    existing = re.search(
+        re.escape(CLASSIFIER_BEGIN) + ".*?" + re.escape(CLASSIFIER_END) + r"\n*" + re.escape(patch.old),
+        content, re.DOTALL)
+    if existing and existing.group() != block + patch.old:
+        was = (existing.group(),)
+    return Patch(patch.filename, patch.old, block + patch.old, patch.description, was=was)
+
+
+GENERATORS = {
+    "path_classifier": path_classifier_patch,
+}
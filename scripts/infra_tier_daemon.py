@@ -0,0 +1,108 @@
+"""
+Daemon-Verdrahtung fuer scripts/bootstrap_infra_tier.py (--daemon / --no-daemon).
+"""
+
+import json
+import os
+import re
+import runpy
+from pathlib import Path
+
+from infra_tier_engine import atomic_write
+from infra_tier_patchset import HOOK_SOURCES, PatchSet
+
+
+# ── Daemon-Modus ─────────────────────────────────────────────────
+# --daemon kopiert infra_hookd.py + infra_hook_client.py aus
+# scripts/infra_tier_hooks/ nach .claude/hooks/ und leitet die Hook-Kommandos
+# der gepatchten Guards in settings.json / settings.local.json ueber den Shim:
+#   python3 .claude/hooks/strict_code_gate.py
+#   → python3 -S .claude/hooks/infra_hook_client.py strict_code_gate
+# --no-daemon stellt die direkten Kommandos wieder her und stoppt den Daemon
+# (per Kontroll-Token aus .claude/hooks/.infra_hookd/, siehe infra_hookd.py).
+
+DAEMON_FILES = ("infra_hook_client.py", "infra_hookd.py")
+SETTINGS_FILES = ("settings.json", "settings.local.json")
+
+DIRECT_COMMAND = re.compile(
+    r"^(?P<py>\S*python3?)\s+(?P<dir>\S*\.claude/hooks/)(?P<hook>\w+)\.py(?P<q>[\"']?)(?P<rest>.*)$")
+CLIENT_COMMAND = re.compile(
+    r"^(?P<py>\S*python3?)\s+-S\s+(?P<dir>\S*\.claude/hooks/)infra_hook_client\.py(?P<q>[\"']?)"
+    r"\s+(?P<hook>\w+)(?P<rest>.*)$")
+
+
+def route_command(command: str, guards: set, enable: bool) -> str:
+    """Rewrite one hook command to go through the shim (or back)."""
+    if enable:
+        match = DIRECT_COMMAND.match(command)
+        if match and match["hook"] in guards:
+            return f"{match['py']} -S {match['dir']}infra_hook_client.py{match['q']} {match['hook']}{match['rest']}"
+    else:
+        match = CLIENT_COMMAND.match(command)
+        if match:
+            return f"{match['py']} {match['dir']}{match['hook']}.py{match['q']}{match['rest']}"
+    return command
+
+
+def wire_settings(settings_path: Path, guards: set, enable: bool) -> int:
+    """Route the guards' hook commands in one settings file. Returns count."""
+    try:
+        settings = json.loads(settings_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return 0
+
+    routed = 0
+    hooks = settings.get("hooks") if isinstance(settings, dict) else None
+    for entries in (hooks or {}).values():
+        for entry in entries if isinstance(entries, list) else []:
+            if not isinstance(entry, dict):
+                continue
+            for hook in entry.get("hooks") or []:
+                command = hook.get("command") if isinstance(hook, dict) else None
+                if not isinstance(command, str):
+                    continue
+                new_command = route_command(command, guards, enable)
+                if new_command != command:
+                    hook["command"] = new_command
+                    routed += 1
+
+    if routed:
+        atomic_write(settings_path, json.dumps(settings, indent=2, ensure_ascii=False) + "\n")
+    return routed
+
+
+def install_file(source: Path, target: Path) -> bool:
+    """Copy source to target (executable) if the content differs."""
+    content = source.read_text(encoding="utf-8")
+    try:
+        if target.read_text(encoding="utf-8") == content:
+            return False
+    except OSError:
+        pass
+    atomic_write(target, content)
+    os.chmod(target, 0o755)
+    return True
+
+
+def stop_daemon(hooks_dir: Path) -> None:
+    """Ask a running daemon for this hooks dir to exit (no-op if none)."""
+    client = runpy.run_path(str(HOOK_SOURCES / "infra_hook_client.py"))
+    client["control"]("!shutdown", str(hooks_dir))
+
+
+def set_daemon_mode(hooks_dir: Path, patch_set: PatchSet, enable: bool) -> list:
+    """Install/remove the daemon wiring. Returns names of changed files."""
+    changed = []
+    if enable:
+        for name in DAEMON_FILES:
+            if install_file(HOOK_SOURCES / name, hooks_dir / name):
+                changed.append(name)
+
+    guards = {Path(filename).stem for _title, filename, _patches in patch_set.groups}
+    for name in SETTINGS_FILES:
+        if wire_settings(hooks_dir.parent / name, guards, enable):
+            changed.append(name)
+
+    if not enable:
+        stop_daemon(hooks_dir)
+    return changed
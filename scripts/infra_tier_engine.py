@@ -0,0 +1,567 @@
+"""
+Patch-Engine fuer scripts/bootstrap_infra_tier.py.
+
+Wendet ein Patch-Set (infra_tier_patchset.py) auf die Hooks eines oder
+mehrerer Checkouts an: ein Lesen und ein atomares Schreiben je Datei, eine
+Transaktion je Checkout, Manifest fuer No-op-Re-Runs.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from infra_tier_anchors import AnchorMatcher, anchors_of, matcher_for
+from infra_tier_codegen import GENERATORS
+from infra_tier_patchset import Patch, PatchSet
+
+HOOKS_DIR = Path(__file__).parent.parent / ".claude" / "hooks"
+
+
+@dataclass
+class PatchResult:
+    """Outcome of a single patch: OK, SKIP or ERROR (error: why, if not the anchor)."""
+    patch: Patch
+    status: str
+    filepath: Path
+    offset: int = None
+    notes: list = field(default_factory=list)
+    error: str = ""
+
+
+@dataclass
+class FilePlan:
+    """All patches for one file, applied with one read and one write."""
+    filepath: Path
+    patches: list = field(default_factory=list)
+    matcher: "AnchorMatcher" = None
+
+
+@dataclass
+class FileOutcome:
+    """Original and patched content of one file, before anything is written."""
+    filepath: Path
+    original: str
+    content: str
+    results: list
+
+
+@dataclass
+class CheckoutResult:
+    """All patch results of one checkout, treated as one transaction."""
+    hooks_dir: Path
+    results: list
+    changed: list = field(default_factory=list)
+    rolled_back: bool = False
+    failure: str = ""
+    up_to_date: bool = False
+
+    @property
+    def has_errors(self) -> bool:
+        return any(result.status == "ERROR" for result in self.results)
+
+    @property
+    def status(self) -> str:
+        if self.rolled_back:
+            return "ROLLBACK"
+        if self.up_to_date and not self.changed:
+            return "UP-TO-DATE"
+        return "PATCHED" if self.changed else "UNCHANGED"
+
+
+def anchor_notes(patches: list, hits: dict) -> dict:
+    """Flag ambiguous anchors (more than one hit) and overlapping old anchors."""
+    notes = {id(patch): [] for patch in patches}
+    for patch in patches:
+        if len(hits[patch.new]) > 1:
+            notes[id(patch)].append(f"Ersatztext kommt {len(hits[patch.new])}x vor (doppelt gepatcht?)")
+        elif len(hits[patch.old]) > 1 and not hits[patch.new]:
+            notes[id(patch)].append(f"Anker kommt {len(hits[patch.old])}x vor — nur der erste Treffer wird ersetzt")
+
+    for i, first in enumerate(patches):
+        for second in patches[i + 1:]:
+            if first.old == second.old or hits[first.new] or hits[second.new]:
+                continue
+            if any(
+                a < b + len(second.old) and b < a + len(first.old)
+                for a in hits[first.old] for b in hits[second.old]
+            ):
+                notes[id(second)].append(f"Anker ueberlappt mit: {first.description}")
+    return notes
+
+
+def first_free(offsets: list, length: int, edits: list):
+    """First offset whose span does not touch a region already replaced."""
+    for offset in offsets:
+        if all(offset + length <= start or end <= offset for start, end, _new, _patch in edits):
+            return offset
+    return None
+
+
+def splice(content: str, edits: list) -> tuple:
+    """Apply non-overlapping edits by offset. Returns (text, inserted spans)."""
+    parts = []
+    inserted = []
+    pos = 0
+    length = 0
+    for start, end, new, patch in sorted(edits, key=lambda edit: edit[0]):
+        parts.append(content[pos:start])
+        length += start - pos
+        parts.append(new)
+        inserted.append((length, length + len(new), patch))
+        length += len(new)
+        pos = end
+    parts.append(content[pos:])
+    return "".join(parts), inserted
+
+
+def creates_later_anchor(patched: str, inserted: list, patches: list) -> bool:
+    """True if inserted text forms an anchor of a patch applied after it."""
+    order = {id(patch): i for i, patch in enumerate(patches)}
+    for start, end, patch in inserted:
+        later = patches[order[id(patch)] + 1:]
+        if not later:
+            continue
+        anchors = anchors_of(later)
+        reach = max(len(anchor) for anchor in anchors)
+        window_hits = matcher_for(anchors).scan(patched, max(0, start - reach + 1), end)
+        for anchor, offsets in window_hits.items():
+            if any(offset < end and start < offset + len(anchor) for offset in offsets):
+                return True
+    return False
+
+
+# ── Patch-Engine ─────────────────────────────────────────────────
+
+def build_plan(hooks_dir: Path, patch_set: PatchSet) -> list:
+    """Group all patches by target file, keeping their declared order."""
+    plans = {}
+    for _title, filename, patches in patch_set.groups:
+        filepath = hooks_dir / filename
+        plan = plans.setdefault(filepath, FilePlan(filepath, matcher=patch_set.matchers.get(filename)))
+        plan.patches.extend(patches)
+    return list(plans.values())
+
+
+def apply_patches(content: str, patches: list, filepath: Path, matcher: AnchorMatcher = None) -> tuple:
+    """Apply patches in order to in-memory content. Returns (content, results).
+
+    A patch whose `new` text is already present is skipped — several anchors
+    are contained in their own replacement, so checking `old` first would
+    re-apply them on every run. For the same reason an earlier version of
+    `new` (patch.was) is looked for before `old`.
+
+    All anchors are located in one pass (AnchorMatcher); replacements are
+    spliced in by offset. If a replacement creates text that a later patch
+    would match, the file falls back to sequential str.replace, which is
+    the reference behaviour.
+    """
+    hits = (matcher or matcher_for(anchors_of(patches))).scan(content)
+    notes = anchor_notes(patches, hits)
+
+    edits = []
+    results = []
+    for patch in patches:
+        new_at = first_free(hits[patch.new], len(patch.new), edits)
+        for old in patch.was + (patch.old,):
+            old_at = first_free(hits[old], len(old), edits)
+            if old_at is not None:
+                break
+        if new_at is not None:
+            results.append(PatchResult(patch, "SKIP", filepath, new_at, notes[id(patch)]))
+        elif old_at is not None:
+            edits.append((old_at, old_at + len(old), patch.new, patch))
+            results.append(PatchResult(patch, "OK", filepath, old_at, notes[id(patch)]))
+        else:
+            results.append(PatchResult(patch, "ERROR", filepath, None, notes[id(patch)]))
+
+    patched, inserted = splice(content, edits)
+    if creates_later_anchor(patched, inserted, patches):
+        return apply_patches_sequential(content, patches, filepath, notes)
+    return patched, results
+
+
+def apply_patches_sequential(content: str, patches: list, filepath: Path, notes: dict) -> tuple:
+    """Reference path: one str.replace per patch on the current content."""
+    results = []
+    for patch in patches:
+        old = next((old for old in patch.was + (patch.old,) if old in content), None)
+        if patch.new in content:
+            results.append(PatchResult(patch, "SKIP", filepath, content.find(patch.new), notes[id(patch)]))
+        elif old is not None:
+            offset = content.find(old)
+            content = content.replace(old, patch.new, 1)
+            results.append(PatchResult(patch, "OK", filepath, offset, notes[id(patch)]))
+        else:
+            results.append(PatchResult(patch, "ERROR", filepath, None, notes[id(patch)]))
+    return content, results
+
+
+def apply_file_patches(content: str, patches: list, filepath: Path, matcher: AnchorMatcher = None) -> tuple:
+    """apply_patches for one file, resolving generated patches on the way.
+
+    A generator sees the content as patched by everything declared before
+    it, so the patches are applied in segments split at each generator.
+    """
+    if not any(patch.generator for patch in patches):
+        return apply_patches(content, patches, filepath, matcher)
+
+    results = []
+    declared = {}
+    segment = []
+    for patch in patches + [None]:
+        if segment and (patch is None or patch.generator):
+            content, segment_results = apply_patches(content, segment, filepath)
+            for result in segment_results:
+                result.patch = declared.get(id(result.patch), result.patch)
+            results.extend(segment_results)
+            segment = []
+        if patch is None:
+            break
+        if patch.generator:
+            try:
+                resolved = GENERATORS[patch.generator](content, patch)
+            except ValueError as e:
+                results.append(PatchResult(patch, "ERROR", filepath, None, [f"{patch.generator}: {e}"]))
+                continue
+            declared[id(resolved)] = patch
+            patch = resolved
+        segment.append(patch)
+    return content, results
+
+
+def atomic_write(filepath: Path, content: str) -> None:
+    """Write content (UTF-8) via temp file in the same directory + rename.
+
+    Symlinks are followed: the file they point to is replaced, the link
+    itself stays (e.g. a hook linked into a shared hooks directory).
+    """
+    filepath = filepath.resolve()
+    fd, tmp_name = tempfile.mkstemp(dir=filepath.parent, prefix=f".{filepath.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        if filepath.exists():
+            os.chmod(tmp_name, filepath.stat().st_mode & 0o7777)
+        os.replace(tmp_name, filepath)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def prepare_file_plan(plan: FilePlan, entry: dict = None) -> FileOutcome:
+    """Read the file once and compute its patched content in memory.
+
+    If the manifest entry's hash matches, the file is known to be fully
+    patched and the anchor scan is skipped.
+    """
+    try:
+        raw = plan.filepath.read_bytes()
+        original = raw.decode()
+    except OSError as e:
+        error = "Datei fehlt" if isinstance(e, FileNotFoundError) else f"Datei nicht lesbar ({e.strerror})"
+        results = [PatchResult(patch, "ERROR", plan.filepath, error=error) for patch in plan.patches]
+        return FileOutcome(plan.filepath, None, None, results)
+    except UnicodeDecodeError as e:
+        error = f"Datei ist kein UTF-8 (Byte {e.start})"
+        results = [PatchResult(patch, "ERROR", plan.filepath, error=error) for patch in plan.patches]
+        return FileOutcome(plan.filepath, None, None, results)
+
+    if entry and entry.get("sha256") == hashlib.sha256(raw).hexdigest():
+        results = [PatchResult(patch, "SKIP", plan.filepath) for patch in plan.patches]
+        return FileOutcome(plan.filepath, original, original, results)
+
+    content, results = apply_file_patches(original, plan.patches, plan.filepath, plan.matcher)
+    return FileOutcome(plan.filepath, original, content, results)
+
+
+def prepare_module(filepath: Path, source: str) -> FileOutcome:
+    """Outcome that installs a shared module (original None: not present yet)."""
+    try:
+        original = filepath.read_text(encoding="utf-8")
+    except OSError:
+        original = None
+    return FileOutcome(filepath, original, source, [])
+
+
+def restore(outcome: FileOutcome) -> None:
+    if outcome.original is None:
+        outcome.filepath.unlink()
+    else:
+        atomic_write(outcome.filepath, outcome.original)
+
+
+def patch_checkout(hooks_dir: Path, patch_set: PatchSet, transactional: bool = True,
+                   force: bool = False) -> CheckoutResult:
+    """Patch all hook files of one checkout.
+
+    If the manifest was written for the current patch set and every file
+    still has the recorded size/mtime/inode, the checkout is up to date
+    without reading any hook file. Otherwise every file is read and
+    patched in memory before anything is written.
+
+    Transactional: if any patch ends in ERROR, nothing is written; if a
+    write fails midway, already written files are restored to their
+    original content. Non-transactional: every file whose patches
+    produced changes is written, regardless of errors in other files; a
+    failed write turns that file's OK results into ERROR (a failed module
+    write is reported in `failure`) instead of raising.
+
+    Shared modules of the patch set ("install") are written first, so a
+    hook never runs against a module that is not there yet — and only if
+    at least one target hook exists (no .claude/hooks/, no modules).
+    """
+    plans = build_plan(hooks_dir, patch_set)
+    modules = [hooks_dir / name for name in patch_set.modules]
+    manifest = {} if force else load_manifest(hooks_dir)
+    known = manifest.get("files", {}) if manifest.get("patch_set_version") == patch_set.version else {}
+
+    tracked = modules + [plan.filepath for plan in plans]
+    if known and all(stat_matches(filepath, known.get(filepath.name)) for filepath in tracked):
+        try:
+            update_manifest(hooks_dir, manifest, None, patch_set)
+        except OSError:
+            pass
+        results = [PatchResult(patch, "SKIP", plan.filepath) for plan in plans for patch in plan.patches]
+        return CheckoutResult(hooks_dir, results, up_to_date=True)
+
+    outcomes = [prepare_file_plan(plan, known.get(plan.filepath.name)) for plan in plans]
+    if any(outcome.original is not None for outcome in outcomes):
+        outcomes[:0] = [prepare_module(filepath, patch_set.modules[filepath.name]) for filepath in modules]
+    checkout = CheckoutResult(hooks_dir, [r for o in outcomes for r in o.results])
+
+    if transactional and checkout.has_errors:
+        checkout.rolled_back = True
+        return checkout
+
+    written = []
+    for outcome in outcomes:
+        if outcome.content is None or outcome.content == outcome.original:
+            continue
+        try:
+            atomic_write(outcome.filepath, outcome.content)
+            if outcome.original is None:
+                os.chmod(outcome.filepath, 0o644)
+        except Exception as e:
+            if transactional:
+                for done in written:
+                    restore(done)
+                checkout.changed.clear()
+                checkout.rolled_back = True
+                checkout.failure = f"Schreibfehler: {e}"
+                return checkout
+            report_write_error(checkout, outcome, e)
+            continue
+        written.append(outcome)
+        checkout.changed.append(outcome.filepath.name)
+
+    try:
+        update_manifest(hooks_dir, manifest, outcomes, patch_set)
+    except OSError:
+        pass  # Manifest ist nur eine Abkuerzung; naechster Lauf scannt neu
+    return checkout
+
+
+def report_write_error(checkout: CheckoutResult, outcome: FileOutcome, error: Exception) -> None:
+    """Record a failed non-transactional write as ERROR; the file stays unchanged."""
+    reason = f"Schreibfehler ({getattr(error, 'strerror', None) or error})"
+    outcome.content = None  # nicht ins Manifest
+    if not outcome.results:
+        checkout.failure = "; ".join(filter(None, (checkout.failure, f"{reason}: {outcome.filepath}")))
+    for result in outcome.results:
+        if result.status == "OK":
+            result.status = "ERROR"
+            result.error = reason
+
+
+# ── Manifest ─────────────────────────────────────────────────────
+# .claude/hooks/.infra_tier.manifest.json haelt pro fertig gepatchter Datei
+# Groesse, mtime, Inode und SHA-256 nach dem Patchen sowie die Patch-Set-
+# Version. Stimmen Version und stat() ueberein, ist ein Re-Run ein No-op.
+# Ist der Checkout komplett gepatcht, stehen dort zusaetzlich Patch-File und
+# stat() aller Quellen der Version (Patch-File, installierte Module, diese
+# Engine) — damit entscheidet bootstrap_infra_tier.py "aktuell" ohne die
+# Engine zu importieren (Format dort gespiegelt, siehe manifest_version()).
+
+MANIFEST_NAME = ".infra_tier.manifest.json"
+ENGINE_SOURCES = tuple(
+    Path(__file__).with_name(name)
+    for name in ("infra_tier_patchset.py", "infra_tier_anchors.py", "infra_tier_codegen.py", "infra_tier_engine.py")
+)
+
+
+def load_manifest(hooks_dir: Path) -> dict:
+    try:
+        manifest = json.loads((hooks_dir / MANIFEST_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def stat_matches(filepath: Path, entry: dict) -> bool:
+    if not entry:
+        return False
+    try:
+        st = filepath.stat()
+    except OSError:
+        return False
+    return (st.st_size, st.st_mtime_ns, st.st_ino) == (entry.get("size"), entry.get("mtime_ns"), entry.get("inode"))
+
+
+def stat_key(path) -> list:
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns, st.st_ino]
+
+
+def source_stats(patch_set: PatchSet) -> dict:
+    """stat keys of every file the patch-set version is derived from."""
+    try:
+        return {str(path): stat_key(path) for path in patch_set.sources + ENGINE_SOURCES}
+    except OSError:
+        return {}
+
+
+def update_manifest(hooks_dir: Path, manifest: dict, outcomes: list, patch_set: PatchSet) -> None:
+    """Record every file whose patches all ended OK/SKIP; drop the rest.
+
+    outcomes None: the checkout is up to date as recorded — only refresh
+    the source stats (e.g. after a checkout touched unchanged scripts).
+    """
+    if outcomes is None:
+        updated = dict(manifest)
+        complete = True
+    else:
+        updated, complete = record_files(outcomes, patch_set.version)
+    updated.pop("sources", None)
+    updated.pop("patch_file", None)
+    sources = source_stats(patch_set) if complete else {}
+    if sources:
+        updated["patch_file"] = patch_set.path
+        updated["sources"] = sources
+    if updated != manifest:
+        atomic_write(hooks_dir / MANIFEST_NAME, json.dumps(updated, indent=2, sort_keys=True) + "\n")
+
+
+def record_files(outcomes: list, version: str) -> tuple:
+    """Manifest entries for the outcomes, and whether every file was recorded."""
+    files = {}
+    for outcome in outcomes:
+        if outcome.content is None or any(r.status == "ERROR" for r in outcome.results):
+            continue
+        st = outcome.filepath.stat()
+        files[outcome.filepath.name] = {
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "inode": st.st_ino,
+            "sha256": hashlib.sha256(outcome.content.encode()).hexdigest(),
+        }
+    return {"patch_set_version": version, "files": files}, len(files) == len(outcomes)
+
+
+def report(result: PatchResult) -> None:
+    """Print one result line in the familiar OK/SKIP/ERROR format."""
+    description = result.patch.description
+    if result.status == "OK":
+        print(f"  OK: {description}")
+    elif result.status == "SKIP":
+        print(f"  SKIP (already patched): {description}")
+    elif result.error:
+        print(f"  ERROR: {result.error}: {description}")
+        print(f"  File: {result.filepath}")
+    else:
+        print(f"  ERROR: Could not find target string for: {description}")
+        print(f"  File: {result.filepath}")
+    for note in result.notes:
+        print(f"    WARN: {note}")
+
+
+# ── Multi-Checkout ───────────────────────────────────────────────
+
+def patch_checkouts(roots: list, patch_set: PatchSet, jobs: int, force: bool = False, daemon: bool = None) -> list:
+    """Patch many repo roots / worktrees in parallel, one transaction each."""
+    from concurrent.futures import ThreadPoolExecutor  # only needed here; slow to import
+    if daemon is not None:
+        from infra_tier_daemon import set_daemon_mode
+
+    def run(hooks_dir):
+        # Ein kaputter Checkout darf den Lauf der anderen nicht abbrechen.
+        # patch_checkout schreibt erst, wenn alles vorbereitet ist, und rollt
+        # Schreibfehler selbst zurueck — eine Exception heisst: nichts geschrieben.
+        try:
+            checkout = patch_checkout(hooks_dir, patch_set, force=force)
+        except Exception as e:
+            return CheckoutResult(hooks_dir, [], rolled_back=True, failure=f"{type(e).__name__}: {e}")
+        if daemon is not None and not checkout.rolled_back:
+            try:
+                checkout.changed.extend(set_daemon_mode(hooks_dir, patch_set, daemon))
+            except Exception as e:
+                checkout.failure = f"Daemon-Modus fehlgeschlagen ({type(e).__name__}: {e})"
+        return checkout
+
+    hooks_dirs = [Path(root).resolve() / ".claude" / "hooks" for root in roots]
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(run, hooks_dirs))
+
+
+def print_summary(checkouts: list) -> None:
+    """Print one table row per checkout instead of per-patch lines."""
+    rows = []
+    for checkout in checkouts:
+        counts = {status: 0 for status in ("OK", "SKIP", "ERROR")}
+        for result in checkout.results:
+            counts[result.status] += 1
+        rows.append((
+            str(checkout.hooks_dir.parent.parent),
+            str(counts["OK"]),
+            str(counts["SKIP"]),
+            str(counts["ERROR"]),
+            str(sum(len(result.notes) for result in checkout.results)),
+            checkout.status,
+        ))
+
+    header = ("Checkout", "OK", "SKIP", "ERROR", "WARN", "Status")
+    widths = [max(len(row[i]) for row in rows + [header]) for i in range(len(header))]
+    line = "  ".join("{:<%d}" % w for w in widths)
+    print(line.format(*header).rstrip())
+    print("  ".join("-" * w for w in widths))
+    for row in rows:
+        print(line.format(*row).rstrip())
+
+    for checkout in checkouts:
+        flagged = [r for r in checkout.results if r.status == "ERROR" or r.notes]
+        if not checkout.rolled_back and not checkout.failure and not flagged:
+            continue
+        print()
+        print(f"{'ROLLBACK' if checkout.rolled_back else 'WARN'} {checkout.hooks_dir}:")
+        if checkout.failure:
+            print(f"  {checkout.failure}")
+        for result in flagged:
+            report(result)
+
+
+def unpatch(hooks_dir: Path, patch_set: PatchSet) -> None:
+    """Reverse the patch set in place (new → old, last patch first)."""
+    for plan in build_plan(hooks_dir, patch_set):
+        try:
+            content = plan.filepath.read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError):
+            continue
+        original = content
+        for patch in reversed(plan.patches):
+            if patch.generator:
+                try:
+                    patch = GENERATORS[patch.generator](content, patch)
+                except ValueError:
+                    continue
+            applied = next((text for text in (patch.new, *patch.was) if text in content), None)
+            if applied is not None:
+                content = content.replace(applied, patch.old, 1)
+        if content != original:
+            atomic_write(plan.filepath, content)
@@ -0,0 +1,329 @@
+"""
+Bash-Command-Klassifikator fuer die Guard-Hooks.
+
+Wird von scripts/bootstrap_infra_tier.py nach .claude/hooks/ installiert und
+von override_token_bash_guard.py und state_integrity_guard.py genutzt:
+
+  verdict = classify_command(command)
+  verdict.only_git                      # jeder Teil ist ein reiner git-Aufruf (ohne VAR=...)
+  verdict.git_subcommands               # ("add", "commit", ...)
+  verdict.mentioning("workflow_state")  # Teilkommandos, die die Datei nennen
+  segment.cli                           # aufgerufenes Script, z.B. "workflow_state_multi.py"
+
+Das Kommando wird EINMAL zerlegt: Teilkommandos getrennt an && || ; | & ( )
+und Zeilenumbruechen, Quotes/Escapes aufgeloest, Redirect-Ziele und
+Command-Substitutions ($(...), `...`, <(...)) je Teil erfasst. Heredoc-
+Bodies werden nicht tokenisiert und nicht kopiert: das Ende wird per
+str.find gesucht, gespeichert wird nur die Spanne; Suchen darin laufen per
+str.count/str.find(needle, start, end) auf dem Original. Ebenso ohne Schleife
+je Zeichen oder Wort: ein Quote-String ("..." mit Escapes, 'a'b'c'-Ketten)
+und eine Folge einfacher Woerter samt Blanks sind je EIN Regex-Match, ein
+MB-grosses python3 -c "..." kostet damit so viel wie ein Heredoc.
+Kommandos ohne Shell-Sonderzeichen (git status, ls -la) sind schlicht
+str.split(); die Token-Regex wird erst fuer das erste andere Kommando
+kompiliert — ein einzeln gestarteter Guard zahlt sie nur, wenn er sie braucht.
+
+Das Ergebnis ist pro Kommando-String gecacht (LRU) — im Daemon teilen sich
+beide Guards damit einen Parse, im Einzelprozess die Abfragen eines Guards.
+Kein vollstaendiger Shell-Parser: unbekannte Konstrukte landen als Woerter im
+jeweiligen Teil; im Zweifel faellt ein Teil damit aus "only_git" heraus
+(strenger), nie hinein.
+"""
+
+import re
+from functools import lru_cache
+
+CACHE_SIZE = 16
+
+TOKEN_PATTERN = r"""
+    (?P<blank>[^\S\n]+)
+  | (?P<newline>\n)
+  | (?P<heredoc><<-?)(?!<)
+  | (?P<subst>\$\(|`|[<>]\()
+  | (?P<redirect>\d*(?:&>>?|>>|>&|>\||<&|<>|<<<|[<>]))
+  | (?P<op>&&|\|\||;;&?|;&|\|&|[;&|()])
+  | (?P<single>'[^']*'(?:[^\s'"\\|&;()<>`$]+'[^']*')*|'[^']*)
+  | (?P<ansi>\$'[^'\\]*(?:\\.[^'\\]*)*'?)
+  | (?P<double>"[^"\\]*(?:\\.[^"\\]*)*"?)
+  | (?P<escape>\\.?)
+  | (?P<text>[^\s'"\\|&;()<>`$][^\n'"\\|&;()<>`$]*|\$)
+"""
+# Ohne diese Zeichen ist ein Kommando nur Woerter und Blanks (ein Teil, kein Quote)
+SHELL_SPECIAL = re.compile(r"[\n'\"\\|&;()<>`$]")
+
+DOUBLE_ESCAPE = re.compile(r"\\(?:\n|([\\$`\"]))")  # \<newline> entfaellt ganz
+ASSIGNMENT = re.compile(r"[A-Za-z_][A-Za-z0-9_]*=")
+PYTHON = re.compile(r"python(?:\d+(?:\.\d+)*)?")
+
+# Woerter vor dem eigentlichen Programm (Shell-Syntax, kein Kommando)
+PREFIX_WORDS = {"{", "!", "then", "do", "else", "elif", "if", "while", "until", "time"}
+# Nicht-schreibende Redirect-Ziele
+HARMLESS_TARGETS = {"/dev/null", "-"}
+
+
+@lru_cache(maxsize=1)
+def token_regex():
+    """TOKEN_PATTERN, compiled on first use."""
+    return re.compile(TOKEN_PATTERN, re.VERBOSE | re.DOTALL)
+
+
+class Segment:
+    """One simple command of a command line."""
+
+    __slots__ = ("command", "words", "redirects", "heredocs", "substitution", "_mentions")
+
+    def __init__(self, command: str):
+        self.command = command
+        self.words = []
+        self.redirects = []
+        self.heredocs = []
+        self.substitution = False
+        self._mentions = {}
+
+    def __bool__(self):
+        return bool(self.words or self.redirects or self.heredocs)
+
+    @property
+    def argv(self) -> list:
+        """Words from the program on (assignments and shell keywords skipped)."""
+        for i, word in enumerate(self.words):
+            if word not in PREFIX_WORDS and not ASSIGNMENT.match(word):
+                return self.words[i:]
+        return []
+
+    @property
+    def program(self) -> str:
+        argv = self.argv
+        return argv[0] if argv else ""
+
+    @property
+    def cli(self) -> str:
+        """Basename of the script this command runs (python3 x.py / ./x.py), else ""."""
+        argv = self.argv
+        if not argv:
+            return ""
+        name = argv[0].rsplit("/", 1)[-1]
+        if name.endswith(".py"):
+            return name
+        if not PYTHON.fullmatch(name):
+            return ""
+        for arg in argv[1:]:
+            if arg in ("-c", "-m", "-"):
+                return ""
+            if not arg.startswith("-"):
+                return arg.rsplit("/", 1)[-1]
+        return ""
+
+    @property
+    def git_subcommand(self) -> str:
+        argv = self.argv
+        if not argv or argv[0] != "git":
+            return ""
+        args = iter(argv[1:])
+        for arg in args:
+            if arg in ("-C", "-c", "--git-dir", "--work-tree", "--namespace"):
+                next(args, None)
+            elif not arg.startswith("-"):
+                return arg
+        return ""
+
+    @property
+    def writes(self) -> list:
+        """Targets of output redirections (fd duplications and /dev/null excluded)."""
+        return [
+            target for op, target in self.redirects
+            if ">" in op and target not in HARMLESS_TARGETS
+            and not (op.endswith("&") and (target.isdigit() or target == "-"))
+        ]
+
+    def mentions(self, needle: str, exclude: tuple = ()) -> bool:
+        """True if needle occurs in a word, redirect target or heredoc body.
+
+        Occurrences that are part of one of the `exclude` strings
+        (e.g. "workflow_state_multi.py" for "workflow_state") do not count.
+        """
+        key = (needle, exclude)
+        if key not in self._mentions:
+            # Woerter und Redirect-Ziele als EIN Text: "\0" kommt in keinem
+            # Needle vor, Treffer ueber Wortgrenzen hinweg sind damit ausgeschlossen
+            text = "\0".join(self.words + [target for _op, target in self.redirects])
+            self._mentions[key] = occurs(text, needle, exclude, 0, len(text)) or any(
+                occurs(self.command, needle, exclude, start, end) for start, end in self.heredocs)
+        return self._mentions[key]
+
+
+def occurs(text: str, needle: str, exclude: tuple, start: int, end: int) -> bool:
+    """needle in text[start:end] outside every occurrence of an exclude string."""
+    if len(exclude) <= 1:
+        # Zaehlen statt Iterieren (C-Geschwindigkeit auch bei MB-Heredocs);
+        # exakt, solange sich needle bzw. exclude nicht selbst ueberlappen
+        covered = sum(text.count(ex, start, end) * ex.count(needle) for ex in exclude)
+        return text.count(needle, start, end) > covered
+    covers = [(ex, k) for ex in exclude for k in range(len(ex)) if ex.startswith(needle, k)]
+    pos = text.find(needle, start, end)
+    while pos != -1:
+        if not any(pos - k >= start and text.startswith(ex, pos - k, end) for ex, k in covers):
+            return True
+        pos = text.find(needle, pos + 1, end)
+    return False
+
+
+def unquote(kind: str, piece: str) -> str:
+    if kind == "single":
+        return piece.replace("'", "")  # 'a'b'c' als ein Token: nur die Quotes fallen weg
+    if kind == "ansi":
+        return piece[2:-1] if len(piece) > 2 and piece.endswith("'") else piece[2:]
+    if kind == "double":
+        inner = piece[1:-1] if len(piece) > 1 and piece.endswith('"') else piece[1:]
+        if "\\" not in inner:
+            return inner
+        return "".join(filter(None, DOUBLE_ESCAPE.split(inner)))
+    if kind == "escape":
+        return "" if piece in ("\\\n", "\\") else piece[1:]
+    return piece
+
+
+def heredoc_end(command: str, pos: int, delimiter: str, strip_tabs: bool) -> tuple:
+    """(body end, resume position) for a heredoc whose body starts at pos.
+
+    pos directly follows a newline. The terminator is a line consisting of the
+    delimiter only (<<-: leading tabs allowed); without one the body runs to
+    the end of the command, as in bash.
+    """
+    end = len(command)
+    if strip_tabs:
+        terminator = re.compile("^\t*" + re.escape(delimiter) + "$", re.MULTILINE)
+        match = terminator.search(command, pos)
+        return (match.start(), min(match.end() + 1, end)) if match else (end, end)
+    line = "\n" + delimiter
+    found = command.find(line, pos - 1)
+    while found != -1:
+        after = found + len(line)
+        if after == end or command[after] == "\n":
+            return found + 1, min(after + 1, end)
+        found = command.find(line, found + 1)
+    return end, end
+
+
+def split_command(command: str) -> list:
+    """Split a command line into Segments in one pass."""
+    if not SHELL_SPECIAL.search(command):
+        segment = Segment(command)
+        segment.words = command.split()
+        return [segment] if segment else []
+    segments = [Segment(command)]
+    pending = []  # heredocs of the current line: (segment, delimiter, strip_tabs)
+    word = []
+    in_word = False
+    redirect = None
+    delimiter_for = None
+    match_token = token_regex().match
+    pos = 0
+    end = len(command)
+
+    def flush():
+        nonlocal word, in_word, redirect, delimiter_for
+        if not in_word:
+            return
+        text = "".join(word)
+        if delimiter_for is not None:
+            pending.append((segments[-1], text, delimiter_for))
+            delimiter_for = None
+        elif redirect is not None:
+            segments[-1].redirects.append((redirect, text))
+            redirect = None
+        else:
+            segments[-1].words.append(text)
+        word = []
+        in_word = False
+
+    while pos < end:
+        match = match_token(command, pos)
+        kind = match.lastgroup
+        piece = match.group()
+        pos = match.end()
+
+        if kind == "blank":
+            flush()
+        elif kind == "newline":
+            flush()
+            # Bodies folgen nacheinander ab der naechsten Zeile; nur Spannen merken
+            for segment, delimiter, strip_tabs in pending:
+                body_end, resume = heredoc_end(command, pos, delimiter, strip_tabs)
+                segment.heredocs.append((pos, body_end))
+                pos = resume
+            pending.clear()
+            segments.append(Segment(command))
+        elif kind == "heredoc":
+            flush()
+            delimiter_for = piece == "<<-"
+        elif kind == "redirect":
+            flush()
+            redirect = piece
+        elif kind == "op":
+            flush()
+            segments.append(Segment(command))
+        elif kind == "text":
+            # Ein Match fuer eine ganze Folge einfacher Woerter samt Blanks (nicht
+            # einer je Wort): das erste setzt ein laufendes Wort fort (bzw. wird
+            # Redirect-Ziel/Delimiter), die mittleren sind fertig, das letzte
+            # laeuft weiter. Blanks am Ende und ein reines Ziffernwort direkt vor
+            # < / > / &> (fd des naechsten Redirects) gehen an den Tokenizer zurueck.
+            run = piece.rstrip()
+            parts = run.split()
+            pos = match.start() + len(run)
+            if len(parts) > 1 and len(run) == len(piece) and command.startswith(("<", ">", "&>"), pos) and parts[-1].isdecimal():
+                pos -= len(parts.pop())
+            word.append(parts[0])
+            in_word = True
+            if len(parts) > 1:
+                flush()
+                word.append(parts.pop())
+                in_word = True
+                segments[-1].words.extend(parts[1:])
+        else:
+            if kind == "subst" or (kind == "double" and ("$(" in piece or "`" in piece)):
+                segments[-1].substitution = True
+            if kind == "subst":
+                flush()
+                continue
+            if piece == "\\\n":
+                continue  # Zeilenfortsetzung: weder Zeichen noch (leeres) Wort
+            word.append(unquote(kind, piece))
+            in_word = True
+    flush()
+    return [segment for segment in segments if segment]
+
+
+class CommandVerdict:
+    """Structured view of one command line, shared by the guards."""
+
+    def __init__(self, command: str):
+        self.command = command
+        self.segments = tuple(split_command(command))
+
+    @property
+    def only_git(self) -> bool:
+        """Every part is a plain git call: no substitutions, no output redirects.
+
+        The first word must be `git` itself: an assignment prefix
+        (GIT_EDITOR=..., GIT_SSH_COMMAND=..., PATH=...) lets git run
+        arbitrary commands, a keyword (time, !, ...) is not worth the doubt.
+        """
+        return bool(self.segments) and all(
+            segment.words[:1] == ["git"] and not segment.substitution and not segment.writes
+            for segment in self.segments
+        )
+
+    @property
+    def git_subcommands(self) -> tuple:
+        return tuple(segment.git_subcommand for segment in self.segments if segment.program == "git")
+
+    def mentioning(self, needle: str, exclude: tuple = ()) -> tuple:
+        """Segments that reference needle (see Segment.mentions)."""
+        return tuple(segment for segment in self.segments if segment.mentions(needle, exclude))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def classify_command(command: str) -> CommandVerdict:
+    return CommandVerdict(command)
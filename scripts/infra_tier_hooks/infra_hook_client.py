@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Client-Shim fuer den Hook-Daemon (infra_hookd.py).
+
+Wird von scripts/bootstrap_infra_tier.py --daemon nach .claude/hooks/ kopiert
+und in settings.json statt der Guards eingetragen:
+
+  python3 -S .claude/hooks/infra_hook_client.py <guard>
+
+Leitet die Hook-Payload (stdin) per Unix-Socket an den Daemon weiter und gibt
+dessen stdout/stderr und Exit-Code (0/2) unveraendert zurueck. Ist der Daemon
+nicht erreichbar, laeuft der Guard in diesem Prozess — mit identischem
+Verhalten — und der Daemon wird im Hintergrund fuer den naechsten Aufruf
+gestartet.
+
+INFRA_HOOKD=0 schaltet den Daemon ab (Guards laufen immer in-process).
+
+Bewusst minimal: nur os/_socket/sys — das socket-Modul (enum, selectors) und
+json kosten allein ~15 ms Import, die Entscheidung im Daemon < 1 ms. Daher
+ein schlankes Byte-Protokoll statt JSON (-S spart zusaetzlich den site-Import):
+
+  Anfrage: b"<len>\n" + b"\0".join([hook, cwd, b"KEY=VAL", ...]) + payload
+  Antwort: b"<exit> <len stdout> <len stderr>\n" + stdout + stderr
+
+Steuerbefehle nutzen "!ping" / "!shutdown" als Hook-Namen und tragen im
+cwd-Feld das Kontroll-Token des Daemons (control()); ohne passendes Token
+lehnt der Daemon sie ab.
+
+Socket, Lock und Token liegen in .claude/hooks/.infra_hookd/ (0700, nicht in
+einem geteilten /tmp): das Verzeichnis schuetzen die Guards selbst (Edit/Write
+ueber strict_code_gate, Bash ueber override_token_bash_guard). Der Client
+spricht nur mit einem Socket in einem privaten Verzeichnis dieses Users und
+prueft per SO_PEERCRED (wo vorhanden), dass der Daemon unter derselben uid
+laeuft. Passt der Socket-Pfad nicht ins AF_UNIX-Limit, laufen die Guards
+immer in-process.
+"""
+
+import _socket
+import os
+import stat
+import sys
+
+HOOKS_DIR = os.path.dirname(os.path.abspath(__file__))
+RUN_DIR = ".infra_hookd"
+SOCKET_NAME = "sock"
+TOKEN_NAME = "token"
+SUN_PATH_MAX = 104  # AF_UNIX sun_path inkl. NUL: macOS 104, Linux 108
+TIMEOUT = 10.0
+FORWARD_ENV_PREFIX = "CLAUDE_"
+
+
+def run_dir(hooks_dir: str = HOOKS_DIR) -> str:
+    """Private directory of the daemon for one hooks dir."""
+    return os.path.join(os.path.realpath(hooks_dir), RUN_DIR)
+
+
+def socket_path(hooks_dir: str = HOOKS_DIR) -> str:
+    """Socket of the daemon for one hooks dir, "" if too long for AF_UNIX."""
+    path = os.path.join(run_dir(hooks_dir), SOCKET_NAME)
+    return path if len(os.fsencode(path)) < SUN_PATH_MAX else ""
+
+
+def is_private_dir(path: str) -> bool:
+    """A real directory (no symlink) owned by this user, closed to everyone else."""
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return stat.S_ISDIR(st.st_mode) and st.st_uid == os.getuid() and not st.st_mode & 0o077
+
+
+def peer_uid(sock):
+    """uid of the process on the other end of a Unix socket; None if the platform can't tell."""
+    option = getattr(_socket, "SO_PEERCRED", None)
+    if option is None:
+        return None
+    creds = sock.getsockopt(_socket.SOL_SOCKET, option, 12)  # struct ucred: pid, uid, gid
+    return int.from_bytes(creds[4:8], sys.byteorder)
+
+
+def encode_request(hook: str, cwd: str, env: dict, payload: bytes = b"") -> bytes:
+    fields = [hook, cwd] + [f"{k}={v}" for k, v in env.items()]
+    header = b"\0".join(field.encode() for field in fields)
+    return b"%d\n" % len(header) + header + payload
+
+
+def decode_reply(reply: bytes):
+    """Split a daemon reply into (stdout, stderr, exit); None if malformed."""
+    head, sep, body = reply.partition(b"\n")
+    try:
+        code, out_len, err_len = (int(part) for part in head.split())
+    except ValueError:
+        return None
+    if not sep or len(body) != out_len + err_len:
+        return None
+    return body[:out_len], body[out_len:], code
+
+
+def request(message: bytes, hooks_dir: str = HOOKS_DIR):
+    """Send one request to the daemon. Returns the raw reply or None."""
+    path = socket_path(hooks_dir)
+    if not path or not is_private_dir(os.path.dirname(path)):
+        return None
+    sock = _socket.socket(_socket.AF_UNIX, _socket.SOCK_STREAM)
+    sock.settimeout(TIMEOUT)
+    try:
+        sock.connect(path)
+        if peer_uid(sock) not in (None, os.getuid()):
+            return None
+        sock.sendall(message)
+        sock.shutdown(_socket.SHUT_WR)
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        return b"".join(chunks)
+    except OSError:
+        return None
+    finally:
+        sock.close()
+
+
+def forward(hook: str, payload: bytes):
+    """Run the guard in the daemon. Returns (stdout, stderr, exit) or None."""
+    env = {k: v for k, v in os.environ.items() if k.startswith(FORWARD_ENV_PREFIX)}
+    reply = request(encode_request(hook, os.getcwd(), env, payload))
+    return decode_reply(reply) if reply else None
+
+
+def control(command: str, hooks_dir: str = HOOKS_DIR):
+    """Send a control command ("!shutdown") with the daemon's token. Raw reply or None."""
+    try:
+        with open(os.path.join(run_dir(hooks_dir), TOKEN_NAME), encoding="ascii") as f:
+            token = f.read().strip()
+    except (OSError, ValueError):
+        return None  # kein Daemon (bzw. keiner, den wir steuern duerfen)
+    return request(encode_request(command, token, {}), hooks_dir)
+
+
+def spawn_daemon() -> None:
+    """Start the daemon detached; a second instance exits on its own."""
+    import subprocess
+    try:
+        subprocess.Popen(
+            [sys.executable, os.path.join(HOOKS_DIR, "infra_hookd.py")],
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            start_new_session=True, close_fds=True,
+        )
+    except OSError:
+        pass
+
+
+def run_in_process(hook_path: str, payload: bytes) -> None:
+    """Fallback: execute the guard here exactly as `python3 <guard>.py` would."""
+    import io
+    import runpy
+    if sys.flags.no_site:
+        import site
+        site.main()
+    sys.argv = [hook_path]
+    sys.stdin = io.TextIOWrapper(io.BytesIO(payload), encoding="utf-8")
+    runpy.run_path(hook_path, run_name="__main__")
+
+
+def main():
+    hook = sys.argv[1] if len(sys.argv) > 1 else ""
+    hook_path = os.path.join(HOOKS_DIR, hook + ".py")
+    if not hook.isidentifier() or not os.path.isfile(hook_path):
+        print(f"infra_hook_client: unbekannter Hook: {hook!r}", file=sys.stderr)
+        sys.exit(2)
+
+    payload = sys.stdin.buffer.read()
+    if os.environ.get("INFRA_HOOKD") != "0" and socket_path():
+        response = forward(hook, payload)
+        if response is not None:
+            stdout, stderr, code = response
+            sys.stdout.buffer.write(stdout)
+            sys.stderr.buffer.write(stderr)
+            sys.exit(code)
+        spawn_daemon()
+
+    run_in_process(hook_path, payload)
+
+
+if __name__ == "__main__":
+    main()
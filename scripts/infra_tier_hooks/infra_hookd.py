@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Hook-Daemon: haelt die Guards aus .claude/hooks/ in einem Prozess geladen.
+
+Wird von scripts/bootstrap_infra_tier.py --daemon installiert und vom
+Client-Shim (infra_hook_client.py) bei Bedarf automatisch gestartet.
+
+Pro Aufruf:
+  - Guard-Code wird einmal kompiliert und gecacht (neu bei mtime/size-Aenderung)
+  - Ausfuehrung wie `python3 <guard>.py`: frische Globals mit __name__ ==
+    "__main__", stdin = Payload, stdout/stderr werden eingesammelt,
+    sys.exit(0/2) wird zum Exit-Code des Clients
+  - cwd und CLAUDE_*-Umgebung kommen vom Client
+  - Geaenderte Module aus .claude/hooks/ werden vor dem Aufruf verworfen
+  - workflow_state.json-Lesezugriffe laufen ueber infra_state.py (falls
+    installiert): geparst wird nur, wenn sich die Datei geaendert hat; jeder
+    Aufruf bekommt eine eigene Kopie
+
+Der Daemon beendet sich nach IDLE_TIMEOUT ohne Anfrage, wenn sich seine
+eigene Datei aendert, oder auf "!shutdown". Protokoll: siehe infra_hook_client.py.
+
+Socket, Lock und Kontroll-Token liegen in .claude/hooks/.infra_hookd/ (0700,
+gehoert dem User des Daemons, sonst startet er nicht). Das Token wird bei
+jedem Start neu gewuerfelt (Datei 0600); Steuerbefehle ohne dieses Token
+werden abgelehnt — "!shutdown" kommt damit nur vom Bootstrap (--no-daemon).
+"""
+
+import contextlib
+import fcntl
+import hmac
+import io
+import os
+import socket
+import stat
+import sys
+import traceback
+
+from infra_hook_client import HOOKS_DIR, TOKEN_NAME, run_dir, socket_path
+
+IDLE_TIMEOUT = 30 * 60
+READ_TIMEOUT = 10.0
+
+
+def file_key(path: str):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def state_reads():
+    """Cached workflow_state reads for one guard call (infra_state.py, if installed)."""
+    try:
+        from infra_state import SharedStateReads
+    except ImportError:
+        return contextlib.nullcontext()
+    return SharedStateReads(copies=True)
+
+
+class HookRunner:
+    """Compiled guards plus freshness tracking of imported hook modules."""
+
+    def __init__(self, hooks_dir: str):
+        self.hooks_dir = hooks_dir
+        self.code = {}
+        self.module_keys = {}
+
+    def compiled(self, hook: str):
+        path = os.path.join(self.hooks_dir, hook + ".py")
+        key = file_key(path)
+        cached = self.code.get(hook)
+        if cached and cached[0] == key:
+            return path, cached[1]
+        with open(path, "rb") as f:
+            code = compile(f.read(), path, "exec")
+        self.code[hook] = (key, code)
+        return path, code
+
+    def drop_stale_modules(self) -> None:
+        """Forget hook-dir modules whose file changed since they were imported."""
+        if any(file_key(path) != key for path, key in self.module_keys.values()):
+            for name in self.module_keys:
+                sys.modules.pop(name, None)
+            self.module_keys.clear()
+
+    def track_modules(self) -> None:
+        prefix = self.hooks_dir + os.sep
+        for name, module in list(sys.modules.items()):
+            path = getattr(module, "__file__", None)
+            if name not in self.module_keys and path and path.startswith(prefix) and name != "infra_hook_client":
+                self.module_keys[name] = (path, file_key(path))
+
+    def run(self, hook: str, payload: bytes, cwd: str, env: dict) -> tuple:
+        """Execute one guard call in-process. Returns exit code and output."""
+        self.drop_stale_modules()
+        path, code = self.compiled(hook)
+
+        saved = sys.stdin, sys.stdout, sys.stderr, sys.argv
+        saved_env = {k: v for k, v in os.environ.items() if k.startswith("CLAUDE_")}
+        stdout = io.TextIOWrapper(io.BytesIO(), encoding="utf-8", write_through=True)
+        stderr = io.TextIOWrapper(io.BytesIO(), encoding="utf-8", write_through=True)
+        sys.stdin = io.TextIOWrapper(io.BytesIO(payload), encoding="utf-8")
+        sys.stdout, sys.stderr = stdout, stderr
+        sys.argv = [path]
+        for k in saved_env:
+            del os.environ[k]
+        os.environ.update(env)
+        try:
+            os.chdir(cwd)
+            with state_reads():
+                exec(code, {"__name__": "__main__", "__file__": path, "__builtins__": __builtins__})
+            status = 0
+        except SystemExit as e:
+            if e.code is None:
+                status = 0
+            elif isinstance(e.code, int):
+                status = e.code
+            else:
+                print(e.code, file=sys.stderr)
+                status = 1
+        except Exception:
+            traceback.print_exc()
+            status = 1
+        finally:
+            sys.stdin, sys.stdout, sys.stderr, sys.argv = saved
+            for k in [k for k in os.environ if k.startswith("CLAUDE_")]:
+                del os.environ[k]
+            os.environ.update(saved_env)
+        self.track_modules()
+
+        return status, stdout.buffer.getvalue(), stderr.buffer.getvalue()
+
+
+def read_request(conn: socket.socket) -> bytes:
+    conn.settimeout(READ_TIMEOUT)
+    chunks = []
+    while True:
+        chunk = conn.recv(1 << 20)
+        if not chunk:
+            return b"".join(chunks)
+        chunks.append(chunk)
+
+
+def handle(conn: socket.socket, runner: HookRunner, token: str) -> bool:
+    """Serve one connection. Returns False when asked to shut down."""
+    data = read_request(conn)
+    length, _, rest = data.partition(b"\n")
+    header, payload = rest[:int(length)], rest[int(length):]
+    hook, cwd, *env = header.decode().split("\0")
+
+    if hook.startswith("!"):
+        # Steuerbefehle nur mit dem Token (im cwd-Feld), sonst koennte jeder
+        # Bash-Aufruf den Daemon stoppen und den Socket selbst bedienen
+        if not hmac.compare_digest(cwd.encode(), token.encode()):
+            message = b"infra_hookd: Steuerbefehl ohne gueltiges Token abgelehnt\n"
+            conn.sendall(b"2 0 %d\n" % len(message) + message)
+            return True
+        conn.sendall(b"0 %d 0\n%d" % (len(str(os.getpid())), os.getpid()))
+        return hook != "!shutdown"
+
+    status, stdout, stderr = runner.run(hook, payload, cwd or HOOKS_DIR, dict(item.split("=", 1) for item in env))
+    conn.sendall(b"%d %d %d\n" % (status, len(stdout), len(stderr)) + stdout + stderr)
+    return True
+
+
+def prepare_run_dir(path: str) -> bool:
+    """Create the private run dir (0700). False if it exists but isn't ours."""
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid():
+        return False
+    os.chmod(path, 0o700)
+    ignore = os.path.join(path, ".gitignore")
+    if not os.path.exists(ignore):
+        with open(ignore, "w", encoding="utf-8") as f:
+            f.write("*\n")
+    return True
+
+
+def write_token(path: str) -> str:
+    """Fresh control token, readable by this user only."""
+    token = os.urandom(16).hex()
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_NOFOLLOW, 0o600)
+    with os.fdopen(fd, "w", encoding="ascii") as f:
+        os.fchmod(f.fileno(), 0o600)
+        f.write(token)
+    return token
+
+
+def serve(hooks_dir: str = HOOKS_DIR) -> int:
+    path = socket_path(hooks_dir)
+    directory = run_dir(hooks_dir)
+    if not path:
+        return 1  # Pfad zu lang fuer AF_UNIX: Client laeuft in-process
+    umask = os.umask(0o077)
+    try:
+        if not prepare_run_dir(directory):
+            print(f"infra_hookd: {directory} gehoert nicht diesem User", file=sys.stderr)
+            return 1
+        lock = open(os.path.join(directory, "lock"), "w")
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return 0  # another daemon already serves this hooks dir
+
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        token_path = os.path.join(directory, TOKEN_NAME)
+        token = write_token(token_path)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(path)
+    finally:
+        os.umask(umask)
+    server.listen(64)
+    server.settimeout(IDLE_TIMEOUT)
+
+    runner = HookRunner(hooks_dir)
+    own_key = file_key(os.path.abspath(__file__))
+    try:
+        while True:
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                break
+            with conn:
+                try:
+                    keep_running = handle(conn, runner, token)
+                except (OSError, ValueError, KeyError):
+                    keep_running = True
+            if not keep_running or file_key(os.path.abspath(__file__)) != own_key:
+                break
+    finally:
+        server.close()
+        for leftover in (path, token_path):
+            try:
+                os.unlink(leftover)
+            except FileNotFoundError:
+                pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(serve())
@@ -0,0 +1,150 @@
+"""
+Pfad-Klassifikator fuer strict_code_gate.py.
+
+Wird von scripts/bootstrap_infra_tier.py nach .claude/hooks/ installiert. Der
+Bootstrap generiert in strict_code_gate.py einen Block, der aus den
+Praedikaten is_always_allowed / is_infrastructure_file / is_code_file die
+Regeln ableitet und sie durch Sichten auf einen PathClassifier ersetzt:
+
+  PATH_CLASSIFIER = PathClassifier.shared({
+      ALWAYS_ALLOWED: [("contains", ALWAYS_ALLOWED_DIRS)],
+      INFRASTRUCTURE: [("contains", INFRASTRUCTURE_DIRS)],
+      CODE: [("endswith", CODE_EXTENSIONS)],
+  })
+  is_code_file = PATH_CLASSIFIER.predicate(CODE)
+
+Alle Regeln aller Kategorien stecken in EINER Regex (je Kategorie ein
+optionaler Lookahead mit benannter Gruppe); ein match() liefert damit alle
+Kategorie-Treffer eines Pfads auf einmal. Jede Regel hat exakt die Semantik
+des Originals: "contains" = `needle in path`, "startswith"/"endswith" wie
+str.startswith/endswith. Praedikate, deren Form der Bootstrap nicht erkennt,
+werden als Fallback unveraendert aufgerufen (Ergebnis trotzdem gecacht).
+
+Die Listenwerte werden beim Erzeugen eingefroren. shared() haelt Instanzen
+(samt kompilierter Regex und Cache) im Modul, geschluesselt nach diesen
+Werten — im Daemon bzw. Bench-Harness, wo der Hook pro Aufruf neu ausgefuehrt
+wird, das Modul aber geladen bleibt, bleibt der Cache so ueber Aufrufe warm.
+Mit Fallbacks wird nicht geteilt (deren Verhalten ist nicht am Schluessel
+ablesbar).
+
+Kompiliert wird erst nach COMPILE_AFTER Lookups: ein einzeln gestarteter Hook
+prueft nur einen Pfad, dort kostet re.compile mehr als die Regeln direkt per
+`in` / str.startswith / str.endswith (Needle-Tupel) auszuwerten. Beide Wege
+liefern dieselben Kategorien; im Daemon/Bench uebernimmt danach die Regex.
+"""
+
+import re
+from functools import lru_cache
+
+ALWAYS_ALLOWED = "always-allowed"
+INFRASTRUCTURE = "infrastructure"
+CODE = "code"
+OTHER = "other"
+
+# Reihenfolge = Vorrang in classify()
+CATEGORIES = (ALWAYS_ALLOWED, INFRASTRUCTURE, CODE)
+CACHE_SIZE = 4096
+COMPILE_AFTER = 16
+SHARED_MAX = 8
+
+SHARED = {}
+
+RULE_TEMPLATES = {
+    "contains": r".*?(?:{})",
+    "startswith": r"(?:{})",
+    "endswith": r".*(?:{})\Z",
+}
+
+
+def freeze(rules: dict) -> tuple:
+    """Hashable snapshot of the rules with the current list values."""
+    return tuple(
+        (category, tuple((kind, tuple(needles)) for kind, needles in category_rules))
+        for category, category_rules in rules.items()
+    )
+
+
+def rule_matches(kind: str, needles: tuple, path: str) -> bool:
+    """One rule evaluated directly, as the original predicate would."""
+    if kind == "contains":
+        return any(needle in path for needle in needles)
+    if kind == "startswith":
+        return path.startswith(needles)
+    return path.endswith(needles)
+
+
+def rule_pattern(kind: str, needles) -> str:
+    """Regex for one rule, anchored at position 0 (used inside a lookahead)."""
+    alternatives = sorted({re.escape(needle) for needle in needles}, key=len, reverse=True)
+    if not alternatives:
+        return r"(?!)"
+    return RULE_TEMPLATES[kind].format("|".join(alternatives))
+
+
+class PathClassifier:
+    """One compiled lookup for every path category, with a bounded LRU cache."""
+
+    def __init__(self, rules: dict, fallbacks: dict = None, cache_size: int = CACHE_SIZE):
+        self.rules = freeze(rules)
+        self.fallbacks = fallbacks or {}
+        self._match = None
+        self._groups = ()
+        self._lookups = 0
+        self.matches = lru_cache(maxsize=cache_size)(self._matches)
+
+    @classmethod
+    def shared(cls, rules: dict, fallbacks: dict = None) -> "PathClassifier":
+        """Instance reused by every execution of the hook in this process."""
+        if fallbacks:
+            return cls(rules, fallbacks)
+        key = freeze(rules)
+        classifier = SHARED.get(key)
+        if classifier is None:
+            if len(SHARED) >= SHARED_MAX:
+                SHARED.clear()
+            classifier = SHARED[key] = cls(rules)
+        return classifier
+
+    def compile(self) -> None:
+        groups = []
+        parts = []
+        for i, (category, rules) in enumerate(self.rules):
+            body = "|".join(rule_pattern(kind, needles) for kind, needles in rules) or r"(?!)"
+            parts.append(f"(?:(?=(?:{body}))(?P<c{i}>))?")
+            groups.append((f"c{i}", category))
+        self._match = re.compile("".join(parts), re.DOTALL).match
+        self._groups = tuple(groups)
+
+    def _matches(self, path: str) -> frozenset:
+        """All categories whose rules (or fallback predicate) accept the path."""
+        if self._match is None and self._lookups < COMPILE_AFTER:
+            self._lookups += 1
+            found = {
+                category for category, rules in self.rules
+                if any(rule_matches(kind, needles, path) for kind, needles in rules)
+            }
+        else:
+            if self._match is None:
+                self.compile()
+            match = self._match(path)
+            found = {category for group, category in self._groups if match[group] is not None}
+        found.update(category for category, predicate in self.fallbacks.items() if predicate(path))
+        return frozenset(found)
+
+    def classify(self, path: str) -> str:
+        """First matching category in CATEGORIES order, else OTHER."""
+        found = self.matches(path)
+        for category in CATEGORIES:
+            if category in found:
+                return category
+        return OTHER
+
+    def predicate(self, category: str):
+        """Drop-in replacement for the original is_*() check of a category."""
+        matches = self.matches
+
+        def check(file_path: str) -> bool:
+            return category in matches(file_path)
+
+        check.__name__ = check.__qualname__ = f"is_{category.replace('-', '_')}"
+        return check
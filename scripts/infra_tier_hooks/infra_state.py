@@ -0,0 +1,154 @@
+"""
+Geteilter Lesezugriff auf workflow_state.json fuer die Guards.
+
+Wird von scripts/bootstrap_infra_tier.py nach .claude/hooks/ installiert und
+von strict_code_gate.py (Infrastructure-Zweig) sowie vom Hook-Daemon genutzt:
+
+  with SharedStateReads():
+      approved = check_user_override(workflow=None, workflow_name="__infra__") or check_user_override()
+
+Innerhalb des Blocks ist workflow_state_multi.load_state durch eine gecachte
+Variante ersetzt — auch fuer Aufrufe aus workflow_state_multi selbst (z.B.
+check_user_override). Die Datei wird einmal je Prozess geparst und danach
+nur per stat() revalidiert (Inode, Groesse, mtime, ctime); ein Schreiben
+(save_state, Editor, git) aendert diesen Schluessel und erzwingt ein neues
+Parsen. Abgeleiteter Index: session_active_name(state) wird je State-Version
+gemerkt, aber nur innerhalb eines SharedStateReads-Blocks (= ein Hook-Aufruf):
+welche Session gemeint ist, steht im Payload des Aufrufs (session_id), nicht
+in cwd/Umgebung — im Daemon folgen Aufrufe verschiedener Sessions aufeinander.
+
+Vertrag:
+  - Standard (copies=False): alle Leser bekommen DASSELBE Objekt und duerfen
+    es nicht veraendern. Fuer reine Pruefungen wie check_user_override.
+  - copies=True: jeder load_state()-Aufruf bekommt eine eigene Kopie (marshal,
+    etwa doppelt so schnell wie json.loads). So nutzt der Daemon den Cache
+    auch fuer schreibende Hooks (override_token_listener). Der Index greift
+    nur fuer das geteilte Objekt, nie fuer (evtl. veraenderte) Kopien.
+  - Ohne auffindbare State-Datei (STATE_FILE des Moduls bzw.
+    .claude/workflow_state.json) wird nichts gecacht.
+"""
+
+import marshal
+import os
+import sys
+
+STATE_MODULE = "workflow_state_multi"
+
+
+def stat_key(path: str):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return os.path.abspath(path), st.st_ino, st.st_size, st.st_mtime_ns, st.st_ctime_ns
+
+
+def state_path(module) -> str:
+    """Path of the state file the module reads (relative paths: current cwd)."""
+    path = getattr(module, "STATE_FILE", None)
+    if path is None:
+        path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(module.__file__))),
+                            "workflow_state.json")
+    return os.fspath(path)
+
+
+class StateCache:
+    """The parsed state of one file version plus values derived from it."""
+
+    def __init__(self):
+        self.key = None
+        self.state = None
+        self.blob = None
+        self.derived = {}
+
+    def load(self, loader, path: str, copies: bool = False):
+        key = stat_key(path)
+        if key is None:
+            return loader()
+        if key != self.key:
+            self.key = None  # loader may raise; never keep a half-updated entry
+            self.state = loader()
+            self.key, self.blob, self.derived = key, None, {}
+        if not copies:
+            return self.state
+        if self.blob is None:
+            try:
+                self.blob = marshal.dumps(self.state)
+            except ValueError:
+                return loader()  # not plain JSON data — no cheap copy
+        return marshal.loads(self.blob)
+
+    def derive(self, fn, state, *args):
+        """fn(state, *args), memoized while `state` is the cached object.
+
+        The memo lives for one SharedStateReads block only (see forget()).
+        """
+        if self.key is None or state is not self.state:
+            return fn(state, *args)
+        key = (fn.__name__, args)
+        try:
+            hash(key)
+        except TypeError:
+            return fn(state, *args)
+        if key not in self.derived:
+            self.derived[key] = fn(state, *args)
+        return self.derived[key]
+
+    def forget(self):
+        """Drop derived values; the parsed state itself stays cached."""
+        self.derived = {}
+
+
+CACHE = StateCache()
+
+
+class SharedStateReads:
+    """Route workflow_state_multi reads through CACHE for the duration of a block."""
+
+    def __init__(self, copies: bool = False):
+        self.copies = copies
+        self.module = None
+        self.saved = {}
+
+    def __enter__(self):
+        CACHE.forget()  # abgeleitete Werte gehoeren zur Session des vorigen Aufrufs
+        module = sys.modules.get(STATE_MODULE)
+        if module is None:
+            try:
+                module = __import__(STATE_MODULE)
+            except Exception:
+                return self
+        original_load = getattr(module, "load_state", None)
+        if original_load is None:
+            return self
+        original_load = getattr(original_load, "__wrapped__", original_load)
+        copies = self.copies
+
+        def load_state(*args, **kwargs):
+            if args or kwargs:
+                return original_load(*args, **kwargs)
+            return CACHE.load(original_load, state_path(module), copies)
+
+        load_state.__wrapped__ = original_load
+        self.module = module
+        self.saved = {"load_state": module.load_state}
+        module.load_state = load_state
+
+        original_name = getattr(module, "session_active_name", None)
+        if original_name is not None:
+            original_name = getattr(original_name, "__wrapped__", original_name)
+
+            def session_active_name(state, *args):
+                return CACHE.derive(original_name, state, *args)
+
+            session_active_name.__wrapped__ = original_name
+            self.saved["session_active_name"] = module.session_active_name
+            module.session_active_name = session_active_name
+        return self
+
+    def __exit__(self, *exc_info):
+        CACHE.forget()
+        for name, value in self.saved.items():
+            setattr(self.module, name, value)
+        self.saved = {}
+        return False
@@ -0,0 +1,228 @@
+"""
+Patch-Set fuer scripts/bootstrap_infra_tier.py: Laden, Validieren, Cachen.
+
+Die Patches stehen deklarativ in scripts/infra_tier_patches.json (Varianten
+per --patches). Die validierte Form wird per marshal in __pycache__/
+gecacht; Schluessel = Hash des Patch-Files.
+"""
+
+import hashlib
+import json
+import marshal
+import os
+import sys
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from infra_tier_anchors import AnchorMatcher, anchors_of
+
+
+@dataclass
+class Patch:
+    """One exact-string replacement in a hook file.
+
+    A patch with a generator has no fixed `new`: it is derived from the
+    file content at apply time (see infra_tier_codegen.GENERATORS). `was` lists earlier
+    versions of `new`; a file carrying one of them is upgraded in place
+    instead of getting the patch applied a second time at `old`.
+    """
+    filename: str
+    old: str
+    new: str
+    description: str
+    generator: str = ""
+    was: tuple = ()
+
+
+
+# ── Patch-Set (deklarativ) ───────────────────────────────────────
+# Die Patches stehen in infra_tier_patches.json (Varianten per --patches).
+# Format: {"format": 1, "name": ..., "install": [...], "groups": [{"title",
+# "file", "patches": [{"description", "old", "new"}]}]}. old/new sind Strings
+# oder Zeilenlisten; die Reihenfolge im File ist die Anwendungsreihenfolge.
+# Statt "new" kann ein Patch "generate": <Generator> angeben — der Ersatztext
+# wird dann beim Anwenden aus dem aktuellen Dateiinhalt erzeugt. "was" (Liste
+# frueherer "new"-Texte) aktualisiert bereits gepatchte Dateien auf den
+# aktuellen Stand.
+# "install" nennt Module aus scripts/infra_tier_hooks/, die die gepatchten
+# Hooks importieren; sie werden in derselben Transaktion mit installiert.
+# Die validierte, kompilierte Form (normalisierte Anker, Matcher-Regex) wird
+# in __pycache__/ neben dem Patch-File abgelegt, Schluessel = Hash des Files.
+
+DEFAULT_PATCHES = Path(__file__).parent / "infra_tier_patches.json"
+HOOK_SOURCES = Path(__file__).parent / "infra_tier_hooks"
+GENERATOR_SOURCE = Path(__file__).parent / "infra_tier_codegen.py"
+PATCH_FORMAT = 1
+CACHE_FORMAT = 3
+
+
+class PatchSetError(ValueError):
+    """Patch file is missing, malformed or fails validation."""
+
+
+@dataclass
+class PatchSet:
+    """Loaded patch definitions, ready to apply."""
+    name: str
+    version: str
+    groups: list
+    matchers: dict
+    modules: dict = field(default_factory=dict)
+    path: str = ""
+    sources: tuple = ()  # Dateien, aus denen `version` abgeleitet ist
+
+
+def load_patch_set(path: Path = DEFAULT_PATCHES) -> PatchSet:
+    """Load a patch file, using the compiled cache when its hash matches."""
+    try:
+        raw = path.read_bytes()
+    except OSError as e:
+        raise PatchSetError(f"{path}: {e.strerror}") from None
+
+    key = hashlib.sha256(raw + f"\0{CACHE_FORMAT}".encode()).hexdigest()[:16]
+    cache_dir = path.parent / "__pycache__"
+    cache_file = cache_dir / f"{path.stem}.{sys.implementation.cache_tag}.{key}.marshal"
+
+    try:
+        with open(cache_file, "rb") as f:
+            return patch_set_from_compiled(marshal.load(f), path)
+    except (OSError, EOFError, ValueError, TypeError, KeyError):
+        pass
+
+    compiled = compile_patch_set(raw, path)
+    try:
+        cache_dir.mkdir(exist_ok=True)
+        for stale in cache_dir.glob(f"{path.stem}.*.marshal"):
+            stale.unlink()
+        fd, tmp_name = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            marshal.dump(compiled, f)
+        os.replace(tmp_name, cache_file)
+    except OSError:
+        pass  # read-only checkout — cache is optional
+    return patch_set_from_compiled(compiled, path)
+
+
+def compile_patch_set(raw: bytes, path: Path) -> dict:
+    """Parse and validate a patch file into plain data (marshal-able)."""
+    from infra_tier_codegen import GENERATORS  # codegen importiert Patch von hier
+
+    try:
+        doc = json.loads(raw)
+    except ValueError as e:
+        raise PatchSetError(f"{path}: kein gueltiges JSON ({e})") from None
+    if not isinstance(doc, dict) or doc.get("format") != PATCH_FORMAT:
+        raise PatchSetError(f"{path}: erwartet Objekt mit \"format\": {PATCH_FORMAT}")
+    if not isinstance(doc.get("groups"), list) or not doc["groups"]:
+        raise PatchSetError(f"{path}: \"groups\" fehlt oder ist leer")
+
+    groups = []
+    anchors = {}
+    for g, group in enumerate(doc["groups"], start=1):
+        where = f"{path}: groups[{g}]"
+        filename = group.get("file") if isinstance(group, dict) else None
+        if not isinstance(filename, str) or not filename or Path(filename).name != filename:
+            raise PatchSetError(f"{where}: \"file\" muss ein Dateiname in .claude/hooks/ sein")
+        if not isinstance(group.get("patches"), list) or not group["patches"]:
+            raise PatchSetError(f"{where}: \"patches\" fehlt oder ist leer")
+
+        patches = []
+        for i, patch in enumerate(group["patches"], start=1):
+            where = f"{path}: groups[{g}].patches[{i}]"
+            if not isinstance(patch, dict) or not isinstance(patch.get("description"), str):
+                raise PatchSetError(f"{where}: \"description\" fehlt")
+            old = normalise_anchor(patch.get("old"), f"{where}.old")
+            generator = patch.get("generate", "")
+            if generator:
+                if generator not in GENERATORS or "new" in patch:
+                    raise PatchSetError(f"{where}: \"generate\" muss einer von {sorted(GENERATORS)} sein (ohne \"new\")")
+                new = ""
+            else:
+                new = normalise_anchor(patch.get("new"), f"{where}.new")
+                if old == new:
+                    raise PatchSetError(f"{where}: old und new sind identisch")
+            if not isinstance(patch.get("was", []), list):
+                raise PatchSetError(f"{where}: \"was\" muss eine Liste frueherer \"new\"-Texte sein")
+            was = [normalise_anchor(value, f"{where}.was[{j}]") for j, value in enumerate(patch.get("was", []), start=1)]
+            patches.append([patch["description"], old, new, generator, was])
+            anchors.setdefault(filename, []).extend([old, new] + was)
+        groups.append([str(group.get("title", filename)), filename, patches])
+
+    install = doc.get("install", [])
+    if not isinstance(install, list) or not all(
+            isinstance(name, str) and name.endswith(".py") and Path(name).name == name for name in install):
+        raise PatchSetError(f"{path}: \"install\" muss eine Liste von Moduldateinamen sein")
+
+    matchers = {}
+    for filename, file_anchors in anchors.items():
+        matcher = AnchorMatcher(file_anchors)
+        matchers[filename] = [matcher.prefix_len, matcher.pattern]
+
+    return {
+        "name": str(doc.get("name", path.stem)),
+        "version": patch_set_fingerprint(groups),
+        "groups": groups,
+        "matchers": matchers,
+        "install": install,
+    }
+
+
+def normalise_anchor(value, where: str) -> str:
+    """Join line lists and normalise line endings; reject empty anchors."""
+    if isinstance(value, list) and all(isinstance(line, str) for line in value):
+        value = "\n".join(value)
+    if not isinstance(value, str) or not value:
+        raise PatchSetError(f"{where}: muss ein nicht-leerer String oder eine Zeilenliste sein")
+    return value.replace("\r\n", "\n")
+
+
+def patch_set_from_compiled(compiled: dict, path: Path) -> PatchSet:
+    groups = [
+        (title, filename, [Patch(filename, old, new, description, generator, tuple(was))
+                           for description, old, new, generator, was in patches])
+        for title, filename, patches in compiled["groups"]
+    ]
+    matchers = {}
+    for filename in compiled["matchers"]:
+        anchors = [a for _t, f, patches in groups if f == filename for p in patches for a in anchors_of([p])]
+        prefix_len, pattern = compiled["matchers"][filename]
+        matchers[filename] = AnchorMatcher(anchors, prefix_len, pattern)
+
+    # Module werden bei jedem Laden frisch gelesen: ihr Inhalt gehoert zur
+    # Version, damit ein geaendertes Modul den Manifest-Fast-Path ungueltig macht.
+    # Ebenso der Generator-Code: ein neuer Generator erzeugt anderen Text fuer
+    # dieselben Anker, die Version (und der Marshal-Cache) kennt nur den Namen.
+    modules = {}
+    version = compiled["version"]
+    sources = [str(path.resolve())]
+    if any(patch.generator for _t, _f, patches in groups for patch in patches):
+        try:
+            generator_code = GENERATOR_SOURCE.read_bytes()
+        except OSError as e:
+            raise PatchSetError(f"{GENERATOR_SOURCE}: {e.strerror}") from None
+        version = hashlib.sha256(f"{version}\0".encode() + generator_code).hexdigest()[:16]
+        sources.append(str(GENERATOR_SOURCE.resolve()))
+    for name in compiled["install"]:
+        try:
+            modules[name] = (HOOK_SOURCES / name).read_text(encoding="utf-8")
+        except OSError as e:
+            raise PatchSetError(f"{HOOK_SOURCES / name}: {e.strerror}") from None
+        version = hashlib.sha256(f"{version}\0{name}\0{modules[name]}".encode()).hexdigest()[:16]
+        sources.append(str((HOOK_SOURCES / name).resolve()))
+    return PatchSet(compiled["name"], version, groups, matchers, modules, sources[0], tuple(sources))
+
+
+def patch_set_fingerprint(groups: list) -> str:
+    """Version of the patch set: hash over all target names and anchors.
+
+    Generated patches only contribute their generator's name here; the
+    generator code itself is mixed in on load (patch_set_from_compiled).
+    """
+    digest = hashlib.sha256()
+    for _title, filename, patches in groups:
+        for _description, old, new, generator, was in patches:
+            for part in (filename, old, new, generator, *was):
+                digest.update(part.encode())
+                digest.update(b"\0")
+    return digest.hexdigest()[:16]